@@ -5,8 +5,16 @@ Handles all OpenAI API interactions
 
 import openai
 import os
+import sys
+import time
 from dotenv import load_dotenv
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.model_router import get_model_router, PRIMARY_MODEL
+from backend.scheduler import current_lane
+
 # Load environment variables
 load_dotenv()
 
@@ -24,38 +32,73 @@ class AIEngine:
         
         openai.api_key = self.api_key
         self.client = openai.OpenAI(api_key=self.api_key)
-        self.model = "gpt-3.5-turbo"  # Using GPT-3.5-turbo for cost efficiency
+        self.model = PRIMARY_MODEL  # Default model, GPT-3.5-turbo for cost efficiency
+        self.router = get_model_router()
     
     
-    def generate_response(self, prompt, max_tokens=1500, temperature=0.7):
+    def _complete(self, prompt, model, max_tokens, temperature, stage=None, route=None):
+        """Send one chat completion request and report its outcome to the router"""
+        started = time.perf_counter()
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are an expert educational AI assistant helping students learn from video content."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        
+        if route:
+            self.router.observe(stage, model, route['ceiling'], response.usage.completion_tokens,
+                                response.choices[0].finish_reason == "length",
+                                time.perf_counter() - started)
+        return response
+    
+    
+    def generate_response(self, prompt, max_tokens=1500, temperature=0.7, stage=None):
         """
         Generate AI response using OpenAI
         
+        A routed answer cut off below the policy ceiling is requested once
+        more at the ceiling; "truncated" is True only if that also hit the limit.
+        
         Args:
             prompt (str): The prompt to send to AI
-            max_tokens (int): Maximum tokens in response
+            max_tokens (int): Maximum tokens in response (upper limit when routed)
             temperature (float): Creativity level (0.0 to 1.0)
+            stage (str): Pipeline stage; when given, the model router picks
+                the model and tightens max_tokens from observed usage
             
         Returns:
             dict: Response containing success status and generated text
         """
+        model = self.model
+        route = None
+        if stage:
+            route = self.router.route(stage, len(prompt), max_tokens, current_lane())
+            model = route['model']
+            max_tokens = route['max_tokens']
+        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert educational AI assistant helping students learn from video content."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+            response = self._complete(prompt, model, max_tokens, temperature, stage, route)
+            tokens_used = response.usage.total_tokens
+            truncated = response.choices[0].finish_reason == "length"
             
-            generated_text = response.choices[0].message.content.strip()
+            if truncated and route and max_tokens < route['ceiling']:
+                # The learned budget was too tight for this answer: retry once at the ceiling
+                print(f"⚠ {stage} answer hit max_tokens={max_tokens}, retrying with {route['ceiling']}")
+                max_tokens = route['ceiling']
+                response = self._complete(prompt, model, max_tokens, temperature, stage, route)
+                tokens_used += response.usage.total_tokens
+                truncated = response.choices[0].finish_reason == "length"
             
             return {
                 "success": True,
-                "text": generated_text,
-                "tokens_used": response.usage.total_tokens
+                "text": response.choices[0].message.content.strip(),
+                "tokens_used": tokens_used,
+                "model": model,
+                "truncated": truncated
             }
             
         except openai.AuthenticationError:
@@ -3,7 +3,7 @@ Smart Video Learning Tool - Flask Backend Server
 Main application server handling all API endpoints
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
 import sys
@@ -11,11 +11,18 @@ import sys
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from backend.youtube_service import get_transcript
-from backend.summarizer import generate_summary
-from backend.keypoints import generate_keypoints
-from backend.quiz_generator import generate_quiz
-from backend.formatter import format_learning_package, format_error_response
+from backend.youtube_service import get_transcript, extract_video_id
+from backend.pipeline import run_pipeline, run_artifact
+from backend.question_bank import run_question_bank, serve_quiz, is_building, building_response, STRATEGIES
+from backend.scheduler import get_scheduler, SchedulerRejected, LANES
+from backend.model_router import get_model_router
+from backend.video_qa import answer_question, MAX_QUESTION_CHARS
+from backend.catalog import get_catalog
+from backend.prefetch import get_prefetcher, read_feed, feed_url_for
+from backend.exporter import run_export, EXPORTS_DIR
+from backend.quiz_attempts import run_record_attempts, get_attempt_recorder
+from backend.reprocess import run_refresh
+from backend.formatter import format_error_response, format_transcript_response
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -24,6 +31,75 @@ CORS(app)  # Enable CORS for frontend communication
 # Configuration
 app.config['JSON_SORT_KEYS'] = False
 
+# Reverse proxies / gateways whose forwarding headers are trusted
+TRUSTED_PROXIES = {
+    address.strip() for address in os.getenv('TRUSTED_PROXIES', '').split(',') if address.strip()
+}
+
+
+def get_client_id():
+    """
+    Identify the calling client for quotas and fair scheduling
+    
+    Clients are keyed on their IP address. X-Client-Id and
+    X-Forwarded-For are only honored when the request comes from one of
+    TRUSTED_PROXIES, since any other caller could pick a fresh value per
+    request and escape its quota.
+    """
+    remote_addr = request.remote_addr or 'anonymous'
+    if remote_addr not in TRUSTED_PROXIES:
+        return remote_addr
+    
+    client_id = request.headers.get('X-Client-Id')
+    if client_id:
+        return client_id
+    
+    # Rightmost address not added by one of our own proxies
+    forwarded = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+    for address in reversed(forwarded):
+        if address not in TRUSTED_PROXIES:
+            return address
+    return remote_addr
+
+
+def get_lane(data):
+    """
+    Priority lane for a client request
+    
+    Requests are interactive by default. "priority": "bulk" lets a client
+    send its own imports behind student requests, but never raises a
+    request above interactive; the scheduler also demotes clients with
+    too many interactive requests in progress. Prefetch, export and bank
+    top-ups are queued as bulk by the server.
+    
+    Returns:
+        str: Lane name, or None if the priority is invalid
+    """
+    lane = data.get('priority', 'interactive')
+    return lane if lane in LANES else None
+
+
+def run_scheduled(func, lane='interactive'):
+    """
+    Run a pipeline job through the scheduler and build the HTTP response
+    
+    Args:
+        func (callable): Job returning (response dict, status code)
+        lane (str): Priority lane ("interactive" or "bulk")
+        
+    Returns:
+        tuple: Flask response and status code
+    """
+    try:
+        ticket = get_scheduler().submit(get_client_id(), func, lane=lane)
+    except SchedulerRejected as e:
+        response = jsonify(format_error_response(str(e), "admission_control"))
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    
+    result, status = ticket.wait()
+    return jsonify(result), status
+
 
 @app.route('/', methods=['GET'])
 def home():
@@ -42,9 +118,17 @@ def process_video():
     
     Expected JSON body:
     {
-        "youtube_url": "https://www.youtube.com/watch?v=..."
+        "youtube_url": "https://www.youtube.com/watch?v=...",
+        "priority": "interactive" | "bulk",   (optional, default interactive)
+        "refresh": false                      (optional, regenerate everything)
     }
     
+    Stored transcripts and artifacts are reused, so repeated requests for
+    the same video do not call YouTube or OpenAI again.
+    
+    Requests are admitted through the scheduler; when the queue is full
+    or the client is over quota the response is 429 with Retry-After.
+    
     Returns:
     {
         "success": true/false,
@@ -66,62 +150,59 @@ def process_video():
             )), 400
         
         youtube_url = data['youtube_url']
+        refresh = bool(data.get('refresh', False))
+        lane = get_lane(data)
         
-        # Step 1: Extract transcript
-        print(f"Extracting transcript for: {youtube_url}")
-        transcript_result = get_transcript(youtube_url)
-        
-        if not transcript_result['success']:
+        if lane is None:
             return jsonify(format_error_response(
-                transcript_result.get('error', 'Transcript extraction failed'),
-                "transcript_extraction"
+                f"Invalid priority '{data.get('priority')}'. Use one of: {', '.join(LANES)}",
+                "validation"
             )), 400
         
-        video_id = transcript_result['video_id']
-        transcript_text = transcript_result['transcript']
-        
-        # Step 2: Generate summary
-        print("Generating summary...")
-        summary_result = generate_summary(transcript_text)
-        
-        if not summary_result['success']:
-            return jsonify(format_error_response(
-                summary_result.get('error', 'Summary generation failed'),
-                "summary_generation"
-            )), 500
-        
-        # Step 3: Generate key points
-        print("Generating key points...")
-        keypoints_result = generate_keypoints(transcript_text)
+        return run_scheduled(lambda: run_pipeline(youtube_url, refresh), lane)
+    
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify(format_error_response(
+            f"Unexpected server error: {str(e)}",
+            "server_error"
+        )), 500
+
+
+@app.route('/api/refresh', methods=['POST'])
+def refresh_video():
+    """
+    Fetch a video's captions again and regenerate only what changed
+    
+    Expected JSON body:
+    {
+        "youtube_url": "https://www.youtube.com/watch?v=...",
+        "priority": "interactive" | "bulk"   (optional, default interactive)
+    }
+    
+    The new caption segments are compared with the stored ones. Artifacts
+    whose input changed are regenerated, everything else is kept. The
+    response is the learning package plus a "refresh" section listing the
+    invalidated and kept artifacts.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        youtube_url = data.get('youtube_url') or data.get('video_id')
         
-        if not keypoints_result['success']:
+        if not youtube_url:
             return jsonify(format_error_response(
-                keypoints_result.get('error', 'Key points generation failed'),
-                "keypoints_generation"
-            )), 500
-        
-        # Step 4: Generate quiz
-        print("Generating quiz questions...")
-        quiz_result = generate_quiz(transcript_text)
+                "Missing youtube_url in request body",
+                "validation"
+            )), 400
         
-        if not quiz_result['success']:
+        lane = get_lane(data)
+        if lane is None:
             return jsonify(format_error_response(
-                quiz_result.get('error', 'Quiz generation failed'),
-                "quiz_generation"
-            )), 500
-        
-        # Step 5: Format complete package
-        learning_package = format_learning_package(
-            video_id,
-            transcript_result,
-            summary_result,
-            keypoints_result,
-            quiz_result
-        )
-        
-        print(f"Successfully generated learning package for video: {video_id}")
+                f"Invalid priority '{data.get('priority')}'. Use one of: {', '.join(LANES)}",
+                "validation"
+            )), 400
         
-        return jsonify(learning_package), 200
+        return run_scheduled(lambda: run_refresh(youtube_url), lane)
     
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
@@ -154,7 +235,7 @@ def get_transcript_only():
         result = get_transcript(youtube_url)
         
         if result['success']:
-            return jsonify(result), 200
+            return jsonify(format_transcript_response(result)), 200
         else:
             return jsonify(result), 400
     
@@ -165,6 +246,387 @@ def get_transcript_only():
         )), 500
 
 
+def regenerate_artifact(name):
+    """
+    Shared handler for the per-artifact endpoints
+    
+    Args:
+        name (str): Artifact name ("summary", "keypoints" or "quiz")
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        video_ref = data.get('youtube_url') or data.get('video_id')
+        
+        if not video_ref:
+            return jsonify(format_error_response(
+                "Missing youtube_url or video_id in request body",
+                "validation"
+            )), 400
+        
+        return run_scheduled(lambda: run_artifact(video_ref, name))
+    
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify(format_error_response(
+            f"Unexpected server error: {str(e)}",
+            "server_error"
+        )), 500
+
+
+@app.route('/api/summary', methods=['POST'])
+def regenerate_summary():
+    """
+    Regenerate only the summary of a video
+    
+    Expected JSON body:
+    {
+        "youtube_url": "https://www.youtube.com/watch?v=..."   (or "video_id": "...")
+    }
+    
+    Uses the saved transcript, so only one AI call is made.
+    """
+    return regenerate_artifact('summary')
+
+
+@app.route('/api/keypoints', methods=['POST'])
+def regenerate_keypoints():
+    """
+    Regenerate only the key points of a video
+    
+    Expected JSON body:
+    {
+        "youtube_url": "https://www.youtube.com/watch?v=..."   (or "video_id": "...")
+    }
+    """
+    return regenerate_artifact('keypoints')
+
+
+@app.route('/api/quiz', methods=['POST'])
+def regenerate_quiz():
+    """
+    Regenerate only the quiz of a video
+    
+    Expected JSON body:
+    {
+        "youtube_url": "https://www.youtube.com/watch?v=..."   (or "video_id": "...")
+    }
+    """
+    return regenerate_artifact('quiz')
+
+
+@app.route('/api/quiz/bank', methods=['POST'])
+def quiz_from_bank():
+    """
+    Serve a quiz from the video's question bank
+    
+    Expected JSON body:
+    {
+        "youtube_url": "https://www.youtube.com/watch?v=...",   (or "video_id": "...")
+        "count": 10,                 (optional)
+        "strategy": "balanced"       (optional, "balanced" or "random")
+    }
+    
+    The first request builds the bank (a few AI calls); after that quizzes
+    are drawn from memory without calling the AI. Requests that arrive
+    while the bank is being built get 202 with Retry-After.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        video_ref = data.get('youtube_url') or data.get('video_id')
+        strategy = data.get('strategy', 'balanced')
+        
+        if not video_ref:
+            return jsonify(format_error_response(
+                "Missing youtube_url or video_id in request body",
+                "validation"
+            )), 400
+        
+        if strategy not in STRATEGIES:
+            return jsonify(format_error_response(
+                f"Invalid strategy '{strategy}'. Use one of: {', '.join(STRATEGIES)}",
+                "validation"
+            )), 400
+        
+        try:
+            count = max(1, min(50, int(data.get('count', 10))))
+        except (TypeError, ValueError):
+            return jsonify(format_error_response(
+                "count must be a number",
+                "validation"
+            )), 400
+        
+        # Fast path: bank already built, no scheduling needed
+        video_id = extract_video_id(video_ref)
+        served = serve_quiz(video_id, count, strategy) if video_id else None
+        if served:
+            return jsonify(served), 200
+        
+        if video_id and is_building(video_id):
+            building = building_response(video_id)
+            response = jsonify(building)
+            response.headers['Retry-After'] = str(building['retry_after'])
+            return response, 202
+        
+        return run_scheduled(lambda: run_question_bank(video_ref, count, strategy))
+    
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify(format_error_response(
+            f"Unexpected server error: {str(e)}",
+            "server_error"
+        )), 500
+
+
+@app.route('/api/quiz/attempts', methods=['POST'])
+def record_quiz_attempt():
+    """
+    Grade and record a submitted quiz
+    
+    Expected JSON body:
+    {
+        "youtube_url": "https://www.youtube.com/watch?v=...",   (or "video_id")
+        "student_id": "...",                                      (optional)
+        "answers": [{"question_id": "...", "answer": "B"}, ...]
+    }
+    
+    "question_index" (position in the stored quiz) can be sent instead of
+    "question_id". Answers are checked against the stored correct answers.
+    """
+    try:
+        result, status = run_record_attempts(request.get_json(silent=True) or {})
+        return jsonify(result), status
+    
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify(format_error_response(
+            f"Unexpected server error: {str(e)}",
+            "server_error"
+        )), 500
+
+
+@app.route('/api/quiz/stats', methods=['GET'])
+def quiz_stats():
+    """
+    Live per-question answer statistics
+    
+    Query parameters:
+        video_id: Video to report (omit for ingestion totals)
+    """
+    video_id = request.args.get('video_id')
+    if video_id is not None and not extract_video_id(video_id):
+        return jsonify(format_error_response("Invalid video_id", "validation")), 400
+    return jsonify(get_attempt_recorder().stats(extract_video_id(video_id) if video_id else None)), 200
+
+
+@app.route('/api/ask', methods=['POST'])
+def ask_video():
+    """
+    Answer a question about a video
+    
+    Expected JSON body:
+    {
+        "youtube_url": "https://www.youtube.com/watch?v=...",   (or "video_id": "...")
+        "question": "What is backpropagation?",
+        "top_k": 4                   (optional, transcript chunks to use)
+    }
+    
+    Returns the answer and the transcript chunks (with timestamps) it was based on.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        video_ref = data.get('youtube_url') or data.get('video_id')
+        question = (data.get('question') or '').strip()
+        
+        if not video_ref or not question:
+            return jsonify(format_error_response(
+                "Missing youtube_url/video_id or question in request body",
+                "validation"
+            )), 400
+        
+        if len(question) > MAX_QUESTION_CHARS:
+            return jsonify(format_error_response(
+                f"Question is too long (at most {MAX_QUESTION_CHARS} characters)",
+                "validation"
+            )), 400
+        
+        try:
+            top_k = max(1, min(8, int(data.get('top_k', 4))))
+        except (TypeError, ValueError):
+            return jsonify(format_error_response(
+                "top_k must be a number",
+                "validation"
+            )), 400
+        
+        return run_scheduled(lambda: answer_question(video_ref, question, top_k))
+    
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify(format_error_response(
+            f"Unexpected server error: {str(e)}",
+            "server_error"
+        )), 500
+
+
+@app.route('/api/history', methods=['GET'])
+def processing_history():
+    """
+    Processing history from the catalog, newest first
+    
+    Query parameters (all optional):
+        video_id, status ("success" / "failed"), since (ISO date), limit
+    """
+    try:
+        limit = max(1, min(500, int(request.args.get('limit', 50))))
+    except ValueError:
+        return jsonify(format_error_response("limit must be a number", "validation")), 400
+    
+    runs = get_catalog().history(
+        video_id=request.args.get('video_id'),
+        status=request.args.get('status'),
+        since=request.args.get('since'),
+        limit=limit
+    )
+    return jsonify({"success": True, "runs": runs, "total": len(runs)}), 200
+
+
+@app.route('/api/invalidations', methods=['GET'])
+def invalidation_history():
+    """
+    Artifacts invalidated by caption changes, newest first
+    
+    Query parameters (all optional):
+        video_id, limit
+    """
+    try:
+        limit = max(1, min(500, int(request.args.get('limit', 100))))
+    except ValueError:
+        return jsonify(format_error_response("limit must be a number", "validation")), 400
+    
+    records = get_catalog().invalidations(video_id=request.args.get('video_id'), limit=limit)
+    return jsonify({"success": True, "invalidations": records, "total": len(records)}), 200
+
+
+@app.route('/api/packages', methods=['GET'])
+def processed_packages():
+    """
+    Videos with a processed learning package, most recent first
+    
+    Query parameters (all optional):
+        since (ISO date), limit
+    """
+    try:
+        limit = max(1, min(1000, int(request.args.get('limit', 100))))
+    except ValueError:
+        return jsonify(format_error_response("limit must be a number", "validation")), 400
+    
+    packages = get_catalog().packages(since=request.args.get('since'), limit=limit)
+    return jsonify({"success": True, "packages": packages, "total": len(packages)}), 200
+
+
+@app.route('/api/prefetch', methods=['POST'])
+def add_prefetch():
+    """
+    Queue upcoming course videos for background processing
+    
+    Expected JSON body (videos and/or one feed):
+    {
+        "videos": ["https://www.youtube.com/watch?v=...", "..."],
+        "playlist_id": "PL...",        (or "channel_id": "UC...")
+        "feed_url": "https://www.youtube.com/feeds/videos.xml?playlist_id=..."
+    }
+    
+    Only YouTube playlist/channel feeds are read.
+    
+    Videos are processed during the off-peak windows within the daily
+    token budget, so the first student to open them gets a cached package.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        videos = list(data.get('videos') or [])
+        
+        feed_url = data.get('feed_url')
+        if not feed_url and (data.get('playlist_id') or data.get('channel_id')):
+            feed_url = feed_url_for(str(data.get('playlist_id') or ''), str(data.get('channel_id') or ''))
+        
+        if feed_url:
+            try:
+                videos.extend(read_feed(feed_url))
+            except Exception as e:
+                return jsonify(format_error_response(
+                    f"Could not read feed: {str(e)}",
+                    "validation"
+                )), 400
+        
+        if not videos:
+            return jsonify(format_error_response(
+                "Provide videos, playlist_id, channel_id and/or feed_url in request body",
+                "validation"
+            )), 400
+        
+        result = get_prefetcher().add(videos)
+        return jsonify({"success": True, **result}), 202
+    
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify(format_error_response(
+            f"Unexpected server error: {str(e)}",
+            "server_error"
+        )), 500
+
+
+@app.route('/api/prefetch', methods=['GET'])
+def prefetch_status():
+    """Prefetch queue, off-peak window and token budget status"""
+    return jsonify(get_prefetcher().status()), 200
+
+
+@app.route('/api/export', methods=['POST'])
+def export_packages():
+    """
+    Export processed learning packages to a file in data/exports/
+    
+    Expected JSON body (all optional):
+    {
+        "format": "jsonl" | "parquet",   (default jsonl, gzip-compressed)
+        "incremental": false,            (only packages since the last export)
+        "include_segments": false        (add timed transcript segments)
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    export_format = data.get('format', 'jsonl')
+    incremental = bool(data.get('incremental', False))
+    include_segments = bool(data.get('include_segments', False))
+    
+    return run_scheduled(
+        lambda: run_export(export_format, incremental, include_segments),
+        lane='bulk'
+    )
+
+
+@app.route('/api/export/<path:filename>', methods=['GET'])
+def download_export(filename):
+    """Download an export file"""
+    return send_from_directory(EXPORTS_DIR, filename, as_attachment=True)
+
+
+@app.route('/api/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    """Queue depth, wait-time and admission statistics of the scheduler"""
+    return jsonify(get_scheduler().stats()), 200
+
+
+@app.route('/api/router/stats', methods=['GET'])
+def router_stats():
+    """Observed completion lengths and latencies used by the model router"""
+    return jsonify(get_model_router().stats()), 200
+
+
+# Start the prefetch workers in every serving process (under the debug
+# reloader only in the child that serves, not in the file watcher)
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    get_prefetcher()
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("Smart Video Learning Tool - Backend Server")
@@ -173,7 +635,24 @@ if __name__ == '__main__':
     print("\nAvailable endpoints:")
     print("  - GET  /              : Health check")
     print("  - POST /api/process   : Process video and generate learning package")
+    print("  - POST /api/refresh   : Re-fetch captions and regenerate what changed")
     print("  - POST /api/transcript: Get transcript only")
+    print("  - POST /api/summary   : Regenerate summary only")
+    print("  - POST /api/keypoints : Regenerate key points only")
+    print("  - POST /api/quiz      : Regenerate quiz only")
+    print("  - POST /api/quiz/bank : Serve a quiz from the question bank")
+    print("  - POST /api/quiz/attempts: Grade and record a quiz submission")
+    print("  - GET  /api/quiz/stats: Per-question answer statistics")
+    print("  - POST /api/ask       : Ask a question about a video")
+    print("  - GET  /api/history   : Processing history")
+    print("  - GET  /api/invalidations: Artifacts invalidated by caption changes")
+    print("  - GET  /api/packages  : Processed videos")
+    print("  - POST /api/prefetch  : Queue upcoming videos for off-peak processing")
+    print("  - GET  /api/prefetch  : Prefetch queue and budget")
+    print("  - POST /api/export    : Export processed packages (JSONL or Parquet)")
+    print("  - GET  /api/export/<file>: Download an export file")
+    print("  - GET  /api/scheduler/stats: Queue depth and wait times")
+    print("  - GET  /api/router/stats: Observed AI usage per stage")
     print("\nMake sure to set OPENAI_API_KEY in .env file")
     print("=" * 60)
     print()
@@ -0,0 +1,90 @@
+"""
+Artifact Store
+Stores generated artifacts (summary, key points, quiz) per video so they can be reused
+"""
+
+import os
+import json
+import tempfile
+from datetime import datetime
+
+
+# Root folder for stored artifacts: data/artifacts/<video_id>/<name>.json
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'artifacts')
+
+
+def _artifact_path(video_id, name):
+    """Build the file path of one artifact"""
+    return os.path.join(ARTIFACTS_DIR, video_id, f"{name}.json")
+
+
+def save_artifact(video_id, name, data):
+    """
+    Store an artifact for a video, replacing any previous version
+
+    The file is written to a temporary name first and then renamed, so
+    readers never see a half-written artifact.
+
+    Args:
+        video_id (str): YouTube video ID
+        name (str): Artifact name (e.g. "summary", "keypoints", "quiz")
+        data (dict): Artifact content
+
+    Returns:
+        bool: True if saved successfully
+    """
+    try:
+        video_dir = os.path.join(ARTIFACTS_DIR, video_id)
+        os.makedirs(video_dir, exist_ok=True)
+
+        record = {
+            "video_id": video_id,
+            "name": name,
+            "saved_at": datetime.now().isoformat(),
+            "data": data
+        }
+
+        fd, tmp_path = tempfile.mkstemp(dir=video_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, _artifact_path(video_id, name))
+        return True
+
+    except Exception as e:
+        print(f"⚠ Warning: Could not save {name} artifact for {video_id}: {str(e)}")
+        return False
+
+
+def load_artifact(video_id, name):
+    """
+    Load a stored artifact for a video
+
+    Args:
+        video_id (str): YouTube video ID
+        name (str): Artifact name
+
+    Returns:
+        dict: Artifact content, or None if not stored
+    """
+    try:
+        with open(_artifact_path(video_id, name), 'r', encoding='utf-8') as f:
+            return json.load(f).get('data')
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠ Warning: Could not read {name} artifact for {video_id}: {str(e)}")
+        return None
+
+
+def delete_artifact(video_id, name):
+    """
+    Remove a stored artifact so it gets regenerated on next use
+
+    Args:
+        video_id (str): YouTube video ID
+        name (str): Artifact name
+    """
+    try:
+        os.remove(_artifact_path(video_id, name))
+    except FileNotFoundError:
+        pass
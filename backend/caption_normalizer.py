@@ -0,0 +1,163 @@
+"""
+Caption Normalizer
+Cleans raw caption segments before they are sent to the AI
+"""
+
+import re
+import html
+
+
+# Non-speech markers such as [Music], [Applause], (laughter), ♪. Only known
+# sound words are matched, so code like arr[0] or [1, 2, 3] is kept.
+NON_SPEECH_WORDS = (
+    r"music|applause|laughter|laughs|laughing|inaudible|silence|cheering|cheers|"
+    r"background noise|noise|crosstalk|no audio|foreign|sighs|coughs|clapping|"
+    r"blank_audio|speaking foreign language|upbeat music|soft music|dramatic music"
+)
+NON_SPEECH_PATTERN = re.compile(
+    rf'\[\s*(?:{NON_SPEECH_WORDS})\s*\]|\(\s*(?:{NON_SPEECH_WORDS})\s*\)|[♪♫]+',
+    re.IGNORECASE
+)
+
+# English filler words that carry no content ("um" is a word in Portuguese)
+FILLER_PATTERN = re.compile(r'\b(?:uh-huh|um+|uh+|erm+|hmm+|mhm)\b[,.]?\s*', re.IGNORECASE)
+
+# Caption languages whose fillers FILLER_PATTERN knows
+FILLER_LANGUAGES = ("en",)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Repeated phrase length (in words) looked for between consecutive segments.
+# Single-word repeats are kept since they are often real speech ("very very").
+MIN_OVERLAP_WORDS = 2
+MAX_OVERLAP_WORDS = 20
+
+# Rough characters-per-token ratio for English text with GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def strips_fillers(language):
+    """True if filler words are removed for captions in this language code"""
+    return bool(language) and language.split('-')[0].lower() in FILLER_LANGUAGES
+
+
+def clean_text(text, strip_fillers=True):
+    """
+    Clean the text of a single caption segment
+
+    Args:
+        text (str): Raw segment text
+        strip_fillers (bool): Remove English filler words
+
+    Returns:
+        str: Text without HTML entities, non-speech markers, fillers and extra whitespace
+    """
+    text = html.unescape(html.unescape(text))
+    text = NON_SPEECH_PATTERN.sub(' ', text)
+    if strip_fillers:
+        text = FILLER_PATTERN.sub('', text)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def _overlap_length(previous_words, words):
+    """Number of leading words of `words` that repeat the tail of `previous_words`"""
+    limit = min(len(previous_words), len(words), MAX_OVERLAP_WORDS)
+    for size in range(limit, MIN_OVERLAP_WORDS - 1, -1):
+        if [w.lower() for w in previous_words[-size:]] == [w.lower() for w in words[:size]]:
+            return size
+    return 0
+
+
+def normalize_segments(segments, stats=None, language=None):
+    """
+    Stream cleaned caption segments
+
+    Auto-generated captions repeat the end of one segment at the start of
+    the next ("rolling" captions). The repeated words are dropped, along
+    with non-speech markers, filler words and whitespace noise. Fillers
+    are only removed for English captions; for other or unknown languages
+    the same sounds can be real words. Segments that end up empty are
+    skipped; start and duration are kept unchanged.
+
+    Args:
+        segments (iterable): Raw segments with 'text', 'start' and 'duration'
+        stats (dict): Optional dict updated in place with character counts
+        language (str): Caption language code (e.g. "en", "pt")
+
+    Yields:
+        dict: Cleaned segment with 'text', 'start' and 'duration'
+    """
+    previous_words = []
+    strip_fillers = strips_fillers(language)
+    if stats is not None:
+        stats.setdefault('raw_chars', 0)
+        stats.setdefault('clean_chars', 0)
+        stats.setdefault('raw_segments', 0)
+        stats.setdefault('clean_segments', 0)
+
+    for segment in segments:
+        raw_text = segment.get('text', '')
+        words = clean_text(raw_text, strip_fillers).split(' ')
+        words = [w for w in words if w]
+        words = words[_overlap_length(previous_words, words):]
+
+        if stats is not None:
+            stats['raw_chars'] += len(raw_text) + 1
+            stats['raw_segments'] += 1
+
+        if not words:
+            continue
+
+        previous_words = (previous_words + words)[-MAX_OVERLAP_WORDS:]
+        text = ' '.join(words)
+
+        if stats is not None:
+            stats['clean_chars'] += len(text) + 1
+            stats['clean_segments'] += 1
+
+        yield {
+            "text": text,
+            "start": segment.get('start', 0.0),
+            "duration": segment.get('duration', 0.0)
+        }
+
+
+def reduction_report(stats):
+    """
+    Summarize how much normalization saved
+
+    Args:
+        stats (dict): Counters filled in by normalize_segments
+
+    Returns:
+        dict: Character, estimated token and segment reduction
+    """
+    raw_chars = max(0, stats.get('raw_chars', 0) - 1)
+    clean_chars = max(0, stats.get('clean_chars', 0) - 1)
+    raw_tokens = -(-raw_chars // CHARS_PER_TOKEN)
+    clean_tokens = -(-clean_chars // CHARS_PER_TOKEN)
+
+    return {
+        "raw_chars": raw_chars,
+        "clean_chars": clean_chars,
+        "chars_removed_percent": round(100 * (raw_chars - clean_chars) / raw_chars, 1) if raw_chars else 0.0,
+        "raw_tokens_estimate": raw_tokens,
+        "clean_tokens_estimate": clean_tokens,
+        "tokens_saved_estimate": raw_tokens - clean_tokens,
+        "raw_segments": stats.get('raw_segments', 0),
+        "clean_segments": stats.get('clean_segments', 0)
+    }
+
+
+if __name__ == "__main__":
+    # Test with typical auto-generated captions
+    test_segments = [
+        {"text": "[Music]", "start": 0.0, "duration": 3.0},
+        {"text": "so um today we&amp;#39;re going to", "start": 3.0, "duration": 2.0},
+        {"text": "we're going to talk about neural", "start": 5.0, "duration": 2.0},
+        {"text": "talk about neural networks [Applause]", "start": 7.0, "duration": 2.0},
+    ]
+    test_stats = {}
+    for cleaned in normalize_segments(test_segments, test_stats, language="en"):
+        print(cleaned)
+    print(reduction_report(test_stats))
@@ -0,0 +1,691 @@
+"""
+Processing Catalog
+SQLite record of learning packages, processing runs, stage timings and token usage
+"""
+
+import os
+import sys
+import queue
+import atexit
+import sqlite3
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from models.prompts import SUMMARY_PROMPT, KEYPOINTS_PROMPT, QUIZ_PROMPT
+
+# Load environment variables
+load_dotenv()
+
+
+CATALOG_PATH = os.getenv('CATALOG_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'data', 'catalog.db'
+)
+POOL_SIZE = int(os.getenv('CATALOG_POOL_SIZE', '4'))
+WRITE_BATCH = 200        # Maximum queued writes committed in one transaction
+BUSY_TIMEOUT_MS = 10000  # How long a writer waits for another process's lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    total_seconds REAL,
+    total_tokens INTEGER,
+    prompt_version TEXT,
+    models TEXT,
+    error TEXT,
+    error_stage TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_video ON runs (video_id, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, started_at);
+
+CREATE TABLE IF NOT EXISTS stage_timings (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    tokens INTEGER,
+    model TEXT,
+    prompt_version TEXT,
+    cached INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_stage_timings_run ON stage_timings (run_id);
+
+CREATE TABLE IF NOT EXISTS packages (
+    video_id TEXT PRIMARY KEY,
+    run_id INTEGER REFERENCES runs (id),
+    generated_at TEXT NOT NULL,
+    language TEXT,
+    word_count INTEGER,
+    package_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_packages_generated ON packages (generated_at);
+CREATE INDEX IF NOT EXISTS idx_packages_run ON packages (run_id);
+
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    student_id TEXT,
+    answer TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    submitted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quiz_attempts_question ON quiz_attempts (video_id, question_id);
+
+CREATE TABLE IF NOT EXISTS invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL,
+    artifact TEXT NOT NULL,
+    reason TEXT,
+    changed_segments INTEGER,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_invalidations_video ON invalidations (video_id, created_at);
+
+CREATE TABLE IF NOT EXISTS prefetch_queue (
+    video_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    queued_at TEXT NOT NULL,
+    claimed_by TEXT,
+    claimed_at REAL,
+    reserved_tokens INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_prefetch_queue_position ON prefetch_queue (position);
+
+CREATE TABLE IF NOT EXISTS prefetch_budget (
+    day TEXT PRIMARY KEY,
+    tokens INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS prefetch_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    tokens INTEGER,
+    error TEXT,
+    finished_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prefetch_results_status ON prefetch_results (status, id);
+"""
+
+# Prompt template per stage; the version is a short hash of the template text
+PROMPT_TEMPLATES = {
+    "summary": SUMMARY_PROMPT,
+    "keypoints": KEYPOINTS_PROMPT,
+    "quiz": QUIZ_PROMPT
+}
+PROMPT_VERSIONS = {
+    stage: hashlib.sha1(template.encode('utf-8')).hexdigest()[:10]
+    for stage, template in PROMPT_TEMPLATES.items()
+}
+PACKAGE_PROMPT_VERSION = hashlib.sha1(
+    "".join(PROMPT_VERSIONS[stage] for stage in sorted(PROMPT_VERSIONS)).encode('utf-8')
+).hexdigest()[:10]
+
+
+def _connect(path):
+    """Open a connection configured for concurrent use"""
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000,
+                                 check_same_thread=False, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return connection
+
+
+class Catalog:
+    """
+    SQLite catalog shared by all worker processes
+
+    The database runs in WAL mode so readers never block the writer.
+    Reads borrow a connection from a small pool. Writes are queued and
+    committed by one background thread per process in batches, so a
+    request never waits for the database lock held by another process.
+    """
+
+    def __init__(self, path=CATALOG_PATH, pool_size=POOL_SIZE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # CREATE ... IF NOT EXISTS is safe when several processes start at once
+        connection = _connect(path)
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._pool = queue.Queue()
+        for _ in range(max(1, pool_size)):
+            self._pool.put(_connect(path))
+
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="catalog-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for reading"""
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+
+    def submit(self, write):
+        """
+        Queue a write to run in the background writer's next transaction
+
+        Args:
+            write (callable): Function taking a sqlite3 connection
+        """
+        self._writes.put(write)
+
+
+    def flush(self, timeout=10):
+        """Wait until all queued writes are committed"""
+        done = threading.Event()
+        self._writes.put(done)
+        done.wait(timeout)
+
+
+    def execute_now(self, write):
+        """
+        Run a write in its own transaction right away and return its result
+
+        For the few writes whose outcome the caller needs, such as claiming
+        a prefetch job. BEGIN IMMEDIATE takes the write lock up front, so
+        the reads inside `write` see no concurrent change from any process.
+
+        Args:
+            write (callable): Function taking a sqlite3 connection
+
+        Returns:
+            Any: Return value of write
+        """
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = write(connection)
+                connection.execute("COMMIT")
+                return result
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+
+    def _write_loop(self):
+        """Commit queued writes in batches"""
+        connection = _connect(self.path)
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            writes = [item for item in batch if callable(item)]
+            if writes and not self._commit(connection, writes) and len(writes) > 1:
+                # Retry one by one so a single bad record does not drop the batch
+                for write in writes:
+                    self._commit(connection, [write])
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+
+    @staticmethod
+    def _commit(connection, writes):
+        """Run writes in one transaction; returns False if it was rolled back"""
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for write in writes:
+                write(connection)
+            connection.execute("COMMIT")
+            return True
+        except Exception as e:
+            print(f"⚠ Warning: Catalog write failed: {str(e)}")
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            return False
+
+
+    def record_run(self, video_id, kind, status, started_at, total_seconds, stages,
+                   error=None, error_stage=None, package=None):
+        """
+        Record one processing run (queued, returns immediately)
+
+        Args:
+            video_id (str): YouTube video ID (None if it could not be extracted)
+            kind (str): "package" for /api/process, or the artifact name for single regenerations
+            status (str): "success" or "failed"
+            started_at (datetime): When the run started
+            total_seconds (float): Wall time of the whole run
+            stages (list): Dicts with stage, seconds, tokens, model and cached
+            error (str): Error message if failed
+            error_stage (str): Stage that failed
+            package (dict): For package runs that (re)wrote the package JSON:
+                generated_at, language, word_count and path of the file
+        """
+        total_tokens = sum(stage.get('tokens') or 0 for stage in stages)
+        models = ",".join(sorted({stage['model'] for stage in stages if stage.get('model')}))
+        prompt_version = PACKAGE_PROMPT_VERSION if kind == "package" else PROMPT_VERSIONS.get(kind)
+
+        def write(connection):
+            cursor = connection.execute(
+                "INSERT INTO runs (video_id, kind, status, started_at, total_seconds, total_tokens,"
+                " prompt_version, models, error, error_stage) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (video_id, kind, status, started_at.isoformat(), round(total_seconds, 3),
+                 total_tokens, prompt_version, models or None, error, error_stage)
+            )
+            run_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO stage_timings (run_id, stage, seconds, tokens, model, prompt_version, cached)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, stage['stage'], round(stage['seconds'], 3), stage.get('tokens'),
+                  stage.get('model'), PROMPT_VERSIONS.get(stage['stage']), int(stage.get('cached', False)))
+                 for stage in stages]
+            )
+            if package is not None and status == "success":
+                connection.execute(
+                    "INSERT INTO packages (video_id, run_id, generated_at, language, word_count, package_path)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (video_id) DO UPDATE SET run_id = excluded.run_id,"
+                    " generated_at = excluded.generated_at, language = excluded.language,"
+                    " word_count = excluded.word_count, package_path = excluded.package_path",
+                    (video_id, run_id, package.get('generated_at') or datetime.now().isoformat(),
+                     package.get('language'), package.get('word_count'), package.get('path'))
+                )
+
+        self.submit(write)
+
+
+    def history(self, video_id=None, status=None, since=None, limit=50):
+        """
+        Query processing runs, newest first
+
+        Args:
+            video_id (str): Only runs for this video
+            status (str): Only runs with this status
+            since (str): Only runs started at or after this ISO date/time
+            limit (int): Maximum number of runs
+
+        Returns:
+            list: Runs with their stage timings
+        """
+        conditions, params = [], []
+        if video_id:
+            conditions.append("video_id = ?")
+            params.append(video_id)
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if since:
+            conditions.append("started_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.connection() as connection:
+            runs = [dict(row) for row in connection.execute(
+                f"SELECT * FROM runs {where} ORDER BY started_at DESC LIMIT ?", params + [limit]
+            )]
+            if runs:
+                placeholders = ",".join("?" * len(runs))
+                stages = {}
+                for row in connection.execute(
+                    f"SELECT * FROM stage_timings WHERE run_id IN ({placeholders})",
+                    [run['id'] for run in runs]
+                ):
+                    stages.setdefault(row['run_id'], []).append(
+                        {key: row[key] for key in row.keys() if key != 'run_id'}
+                    )
+                for run in runs:
+                    run['stages'] = stages.get(run['id'], [])
+        return runs
+
+
+    def packages(self, since=None, limit=100):
+        """
+        List processed videos, most recently generated first
+
+        Args:
+            since (str): Only packages generated at or after this ISO date/time
+            limit (int): Maximum number of packages
+
+        Returns:
+            list: Package records
+        """
+        query = "SELECT * FROM packages"
+        params = []
+        if since:
+            query += " WHERE generated_at >= ?"
+            params.append(since)
+        query += " ORDER BY generated_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self.connection() as connection:
+            return [dict(row) for row in connection.execute(query, params)]
+
+
+    def iter_packages(self, after_run_id=None, page_size=500):
+        """
+        Iterate package records in run_id order
+
+        run_id comes from the single writer thread, so it grows in commit
+        order: a package written after a reader's last page always has a
+        higher run_id, unlike generated_at which is taken when the run
+        started. Rows are read one page at a time and the connection is
+        returned to the pool between pages, so a long export neither holds
+        a read transaction open nor loads the whole table.
+
+        Args:
+            after_run_id (int): run_id of the last record already seen
+            page_size (int): Rows per query
+
+        Yields:
+            dict: Package records
+        """
+        after_run_id = after_run_id or 0
+        while True:
+            with self.connection() as connection:
+                rows = connection.execute(
+                    "SELECT * FROM packages WHERE run_id > ? ORDER BY run_id LIMIT ?",
+                    (after_run_id, page_size)
+                ).fetchall()
+
+            for row in rows:
+                yield dict(row)
+            if len(rows) < page_size:
+                return
+            after_run_id = rows[-1]['run_id']
+
+
+    def packages_for(self, video_ids):
+        """
+        Package records of the given videos
+
+        Args:
+            video_ids (list): YouTube video IDs
+
+        Returns:
+            list: Package records in run_id order (videos without a package are left out)
+        """
+        if not video_ids:
+            return []
+        placeholders = ", ".join("?" for _ in video_ids)
+        with self.connection() as connection:
+            return [dict(row) for row in connection.execute(
+                f"SELECT * FROM packages WHERE video_id IN ({placeholders}) ORDER BY run_id",
+                list(video_ids)
+            )]
+
+
+    def record_attempts(self, attempts):
+        """
+        Store graded quiz answers (queued, returns immediately)
+
+        Args:
+            attempts (list): Tuples of (video_id, question_id, student_id,
+                answer, correct, submitted_at)
+        """
+        def write(connection):
+            connection.executemany(
+                "INSERT INTO quiz_attempts (video_id, question_id, student_id, answer, correct, submitted_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                attempts
+            )
+
+        self.submit(write)
+
+
+    def attempt_counts(self, video_id):
+        """
+        Answer counts per question of a video
+
+        Args:
+            video_id (str): YouTube video ID
+
+        Returns:
+            list: Rows with question_id, answer, correct and count
+        """
+        with self.connection() as connection:
+            return [dict(row) for row in connection.execute(
+                "SELECT question_id, answer, correct, COUNT(*) AS count FROM quiz_attempts"
+                " WHERE video_id = ? GROUP BY question_id, answer, correct",
+                (video_id,)
+            )]
+
+
+    def record_invalidations(self, video_id, invalidated, changed_segments):
+        """
+        Record which artifacts a caption change invalidated (queued, returns immediately)
+
+        Args:
+            video_id (str): YouTube video ID
+            invalidated (list): Dicts with artifact and reason
+            changed_segments (int): Number of caption segments that changed
+        """
+        created_at = datetime.now().isoformat()
+
+        def write(connection):
+            connection.executemany(
+                "INSERT INTO invalidations (video_id, artifact, reason, changed_segments, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(video_id, item['artifact'], item.get('reason'), changed_segments, created_at)
+                 for item in invalidated]
+            )
+
+        self.submit(write)
+
+
+    def invalidations(self, video_id=None, limit=100):
+        """
+        Query recorded invalidations, newest first
+
+        Args:
+            video_id (str): Only invalidations of this video
+            limit (int): Maximum number of records
+
+        Returns:
+            list: Invalidation records
+        """
+        query = "SELECT * FROM invalidations"
+        params = []
+        if video_id:
+            query += " WHERE video_id = ?"
+            params.append(video_id)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self.connection() as connection:
+            return [dict(row) for row in connection.execute(query, params)]
+
+
+    def prefetch_add(self, video_ids):
+        """
+        Append videos to the shared prefetch queue
+
+        Args:
+            video_ids (list): YouTube video IDs
+
+        Returns:
+            int: Number of videos added (the others are already queued or running)
+        """
+        queued_at = datetime.now().isoformat()
+
+        def write(connection):
+            added = 0
+            for video_id in video_ids:
+                added += connection.execute(
+                    "INSERT OR IGNORE INTO prefetch_queue (video_id, position, queued_at)"
+                    " VALUES (?, COALESCE((SELECT MAX(position) FROM prefetch_queue), 0) + 1, ?)",
+                    (video_id, queued_at)
+                ).rowcount
+            return added
+
+        return self.execute_now(write)
+
+
+    def prefetch_claim(self, worker, day, daily_tokens, default_estimate, claim_timeout):
+        """
+        Claim the next prefetch job if the day's token budget allows another video
+
+        Tokens already used today plus the estimates reserved by running
+        jobs of all processes plus the estimate for this job must fit in
+        daily_tokens. Claims older than claim_timeout belong to a worker
+        that died and can be taken over.
+
+        Args:
+            worker (str): Identifier of the claiming worker
+            day (str): Budget day (ISO date, local time)
+            daily_tokens (int): Token budget per day
+            default_estimate (int): Token estimate before any video finished
+            claim_timeout (float): Seconds after which a claim expires
+
+        Returns:
+            tuple: (video_id, reserved tokens), or None if nothing may start
+        """
+        def write(connection):
+            now = time.time()
+            used = connection.execute(
+                "SELECT tokens FROM prefetch_budget WHERE day = ?", (day,)
+            ).fetchone()
+            reserved = connection.execute(
+                "SELECT COALESCE(SUM(reserved_tokens), 0) FROM prefetch_queue"
+                " WHERE claimed_by IS NOT NULL AND claimed_at >= ?",
+                (now - claim_timeout,)
+            ).fetchone()[0]
+            estimate = self._prefetch_estimate(connection, default_estimate)
+            if (used[0] if used else 0) + reserved + estimate > daily_tokens:
+                return None
+
+            row = connection.execute(
+                "SELECT video_id FROM prefetch_queue WHERE claimed_by IS NULL OR claimed_at < ?"
+                " ORDER BY position LIMIT 1",
+                (now - claim_timeout,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE prefetch_queue SET claimed_by = ?, claimed_at = ?, reserved_tokens = ?"
+                " WHERE video_id = ?",
+                (worker, now, estimate, row['video_id'])
+            )
+            return row['video_id'], estimate
+
+        return self.execute_now(write)
+
+
+    def prefetch_finish(self, video_id, worker, day, status, tokens, error=None, requeue=False):
+        """
+        Release a claimed prefetch job, charge its tokens and record the result
+
+        Args:
+            video_id (str): YouTube video ID
+            worker (str): Worker that claimed the job
+            day (str): Budget day the tokens are charged to
+            status (str): "done", "cached", "failed" or "deferred"
+            tokens (int): Tokens spent
+            error (str): Error message of a failed job
+            requeue (bool): Put the video back at the front of the queue
+        """
+        def write(connection):
+            if requeue:
+                connection.execute(
+                    "UPDATE prefetch_queue SET claimed_by = NULL, claimed_at = NULL, reserved_tokens = 0,"
+                    " position = (SELECT MIN(position) FROM prefetch_queue) - 1"
+                    " WHERE video_id = ? AND claimed_by = ?",
+                    (video_id, worker)
+                )
+            else:
+                connection.execute(
+                    "DELETE FROM prefetch_queue WHERE video_id = ? AND claimed_by = ?",
+                    (video_id, worker)
+                )
+            if tokens:
+                connection.execute(
+                    "INSERT INTO prefetch_budget (day, tokens) VALUES (?, ?)"
+                    " ON CONFLICT(day) DO UPDATE SET tokens = tokens + excluded.tokens",
+                    (day, tokens)
+                )
+            connection.execute(
+                "INSERT INTO prefetch_results (video_id, status, tokens, error, finished_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (video_id, status, tokens, error, datetime.now().isoformat())
+            )
+
+        self.execute_now(write)
+
+
+    def prefetch_status(self, day, default_estimate, claim_timeout, limit=20):
+        """
+        Shared prefetch queue, running jobs, token usage and recent results
+
+        Returns:
+            dict: queued, next, running, tokens_used_today,
+                estimated_tokens_per_video and recent
+        """
+        cutoff = time.time() - claim_timeout
+        with self.connection() as connection:
+            waiting = "claimed_by IS NULL OR claimed_at < ?"
+            used = connection.execute(
+                "SELECT tokens FROM prefetch_budget WHERE day = ?", (day,)
+            ).fetchone()
+            return {
+                "tokens_used_today": used[0] if used else 0,
+                "estimated_tokens_per_video": self._prefetch_estimate(connection, default_estimate),
+                "queued": connection.execute(
+                    f"SELECT COUNT(*) FROM prefetch_queue WHERE {waiting}", (cutoff,)
+                ).fetchone()[0],
+                "next": [row[0] for row in connection.execute(
+                    f"SELECT video_id FROM prefetch_queue WHERE {waiting} ORDER BY position LIMIT ?",
+                    (cutoff, limit)
+                )],
+                "running": [row[0] for row in connection.execute(
+                    "SELECT video_id FROM prefetch_queue WHERE claimed_by IS NOT NULL AND claimed_at >= ?",
+                    (cutoff,)
+                )],
+                "recent": [dict(row) for row in connection.execute(
+                    "SELECT video_id, status, tokens, error, finished_at FROM prefetch_results"
+                    " ORDER BY id DESC LIMIT ?",
+                    (limit,)
+                )]
+            }
+
+
+    @staticmethod
+    def _prefetch_estimate(connection, default_estimate, samples=50):
+        """Average tokens of the latest finished prefetch jobs"""
+        average = connection.execute(
+            "SELECT AVG(tokens) FROM (SELECT tokens FROM prefetch_results"
+            " WHERE status = 'done' ORDER BY id DESC LIMIT ?)",
+            (samples,)
+        ).fetchone()[0]
+        return int(average) if average is not None else default_estimate
+
+
+# Global catalog instance
+catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """Get or create catalog instance"""
+    global catalog
+    if catalog is None:
+        with _catalog_lock:
+            if catalog is None:
+                catalog = Catalog()
+    return catalog
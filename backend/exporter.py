@@ -0,0 +1,288 @@
+"""
+Bulk Exporter
+Streams processed learning packages and transcripts to compressed JSONL or Parquet files
+"""
+
+import sys
+import os
+import json
+import gzip
+import argparse
+import itertools
+import tempfile
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.catalog import get_catalog
+from backend.youtube_service import load_saved_transcript
+from backend.formatter import format_error_response
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+
+EXPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'exports')
+CHECKPOINT_FILE = 'checkpoint.json'
+PARQUET_ROW_GROUP = 256    # Records buffered per Parquet row group
+FORMATS = ("jsonl", "parquet")
+
+
+def iter_records(after_run_id=None, include_segments=False, skipped=None, retry=None):
+    """
+    Read exported records one package at a time
+
+    Args:
+        after_run_id (int): Checkpoint; only packages written by later runs are read
+        include_segments (bool): Add the timed transcript segments
+        skipped (list): Receives the video IDs whose package file could not be read
+        retry (list): Video IDs skipped by the previous export, read again first
+
+    Yields:
+        tuple: (run_id position, record dict)
+    """
+    # Retried packages rewritten since then come with the newer runs below
+    retry_rows = [row for row in get_catalog().packages_for(retry or [])
+                  if after_run_id is None or row['run_id'] <= after_run_id]
+
+    for row in itertools.chain(retry_rows, get_catalog().iter_packages(after_run_id)):
+        position = row['run_id']
+        try:
+            with open(row['package_path'], 'r', encoding='utf-8') as f:
+                package = json.load(f)
+        except Exception as e:
+            print(f"⚠ Warning: Could not read package of {row['video_id']}: {str(e)}")
+            if skipped is not None:
+                skipped.append(row['video_id'])
+            continue
+
+        record = {
+            "video_id": row['video_id'],
+            "generated_at": row['generated_at'],
+            "language": row['language'],
+            "word_count": row['word_count'],
+            "transcript": package.get('transcript', {}).get('text', ''),
+            "summary": package.get('summary', {}).get('text', ''),
+            "key_points": package.get('key_points', {}).get('points', []),
+            "quiz": package.get('quiz', {}).get('questions', [])
+        }
+        if include_segments:
+            saved = load_saved_transcript(row['video_id'])
+            record["segments"] = list(saved['transcript']) if saved else []
+
+        yield position, record
+
+
+class JsonlWriter:
+    """Writes one JSON record per line to a gzip file"""
+
+    def __init__(self, path, include_segments=False):
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes records to a Parquet file in row groups of PARQUET_ROW_GROUP records"""
+
+    def __init__(self, path, include_segments=False):
+        fields = [
+            ("video_id", pa.string()),
+            ("generated_at", pa.string()),
+            ("language", pa.string()),
+            ("word_count", pa.int64()),
+            ("transcript", pa.string()),
+            ("summary", pa.string()),
+            ("key_points", pa.list_(pa.string())),
+            ("quiz", pa.list_(pa.struct([
+                ("id", pa.string()),
+                ("question", pa.string()),
+                ("options", pa.map_(pa.string(), pa.string())),
+                ("correct_answer", pa.string())
+            ])))
+        ]
+        if include_segments:
+            fields.append(("segments", pa.list_(pa.struct([
+                ("text", pa.string()),
+                ("start", pa.float64()),
+                ("duration", pa.float64())
+            ]))))
+        self._schema = pa.schema(fields)
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+        self._rows = []
+
+
+    def write(self, record):
+        record = dict(record, quiz=[
+            {
+                "id": question.get('id'),
+                "question": question.get('question'),
+                "options": list(question.get('options', {}).items()),
+                "correct_answer": question.get('correct_answer')
+            }
+            for question in record['quiz']
+        ])
+        self._rows.append(record)
+        if len(self._rows) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {
+    "jsonl": (JsonlWriter, ".jsonl.gz"),
+    "parquet": (ParquetWriter, ".parquet")
+}
+
+
+def load_checkpoint(output_dir, export_format):
+    """
+    Checkpoint of the last export of a format
+
+    Returns:
+        tuple: (package run_id or None, video IDs to retry); checkpoints
+            without a run_id start over
+    """
+    try:
+        with open(os.path.join(output_dir, CHECKPOINT_FILE), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f).get(export_format) or {}
+    except FileNotFoundError:
+        return None, []
+    return checkpoint.get('run_id'), checkpoint.get('retry', [])
+
+
+def save_checkpoint(output_dir, export_format, run_id, path, retry=None):
+    """Record the last exported package for the next incremental export"""
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoints = json.load(f)
+    except FileNotFoundError:
+        checkpoints = {}
+
+    checkpoints[export_format] = {
+        "run_id": run_id,
+        "retry": list(retry or []),
+        "exported_at": datetime.now().isoformat(),
+        "path": path
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(checkpoints, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def export_packages(export_format="jsonl", incremental=False, include_segments=False,
+                    output_dir=EXPORTS_DIR):
+    """
+    Export processed packages to one file, streaming record by record
+
+    Memory use does not grow with the corpus: packages are read one at a
+    time and only a single Parquet row group is buffered. Packages whose
+    file could not be read are kept in the checkpoint and retried by the
+    next incremental export.
+
+    Args:
+        export_format (str): "jsonl" (gzip-compressed) or "parquet"
+        incremental (bool): Only export packages written since the last checkpoint
+        include_segments (bool): Add the timed transcript segments
+        output_dir (str): Directory for export files and the checkpoint
+
+    Returns:
+        dict: Export result with the file path and number of records
+    """
+    if export_format not in WRITERS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    if export_format == "parquet" and pa is None:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    after, retry = load_checkpoint(output_dir, export_format) if incremental else (None, [])
+    writer_class, extension = WRITERS[export_format]
+    filename = f"packages_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{extension}"
+    path = os.path.join(output_dir, filename)
+
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+    os.close(fd)
+    skipped = []
+    count = 0
+    position = after
+    try:
+        writer = writer_class(tmp_path, include_segments)
+        try:
+            for run_id, record in iter_records(after, include_segments, skipped, retry):
+                writer.write(record)
+                count += 1
+                position = max(position or 0, run_id)
+        finally:
+            writer.close()
+
+        if count:
+            os.replace(tmp_path, path)
+            print(f"✓ Exported {count} learning packages to: {path}")
+        if count or skipped != retry:
+            save_checkpoint(output_dir, export_format, position, filename if count else None, skipped)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "success": True,
+        "format": export_format,
+        "file": filename if count else None,
+        "records": count,
+        "skipped": skipped,
+        "after_run_id": after,
+        "until_run_id": position
+    }
+
+
+def run_export(export_format="jsonl", incremental=False, include_segments=False):
+    """
+    Export job for the API
+
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    try:
+        return export_packages(export_format, incremental, include_segments), 200
+    except ValueError as e:
+        return format_error_response(str(e), "validation"), 400
+    except Exception as e:
+        print(f"Export failed: {str(e)}")
+        return format_error_response(f"Export failed: {str(e)}", "export"), 500
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export processed learning packages")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only packages written since the last export")
+    parser.add_argument("--segments", action="store_true",
+                        help="include timed transcript segments")
+    parser.add_argument("--output-dir", default=EXPORTS_DIR)
+    args = parser.parse_args()
+
+    result = export_packages(args.format, args.incremental, args.segments, args.output_dir)
+    print(json.dumps(result, indent=2))
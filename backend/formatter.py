@@ -4,8 +4,18 @@ Structures and formats the complete learning package
 """
 
 import json
+import os
+import re
+import sys
+import hashlib
+import unicodedata
 from datetime import datetime
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.transcript import transcript_text
+
 
 def format_learning_package(video_id, transcript_data, summary_data, keypoints_data, quiz_data):
     """
@@ -27,25 +37,114 @@ def format_learning_package(video_id, transcript_data, summary_data, keypoints_d
         "video_id": video_id,
         "generated_at": datetime.now().isoformat(),
         "transcript": {
-            "text": transcript_data.get('transcript', ''),
-            "word_count": transcript_data.get('word_count', 0)
-        },
-        "summary": {
-            "text": summary_data.get('summary', 'Summary not available')
-        },
-        "key_points": {
-            "points": keypoints_data.get('keypoints', []),
-            "total": len(keypoints_data.get('keypoints', []))
+            "text": transcript_text(transcript_data.get('transcript', '')),
+            "word_count": transcript_data.get('word_count', 0),
+            "normalization": transcript_data.get('normalization')
         },
-        "quiz": {
-            "questions": quiz_data.get('quiz', []),
-            "total_questions": len(quiz_data.get('quiz', []))
-        }
+        "summary": format_summary(summary_data),
+        "key_points": format_keypoints(keypoints_data),
+        "quiz": format_quiz(quiz_data)
     }
     
     return package
 
 
+def format_transcript_response(transcript_data):
+    """
+    Format a transcript result for JSON output
+    
+    Args:
+        transcript_data (dict): Successful get_transcript result
+        
+    Returns:
+        dict: Result with plain transcript text and a list of segments
+    """
+    transcript = transcript_data['transcript']
+    response = dict(transcript_data)
+    response['transcript'] = transcript_text(transcript)
+    response['segments'] = list(transcript) if not isinstance(transcript, str) else []
+    response.pop('from_cache', None)
+    return response
+
+
+def format_summary(summary_data):
+    """Format the summary section of a learning package"""
+    return {
+        "text": summary_data.get('summary', 'Summary not available')
+    }
+
+
+def format_keypoints(keypoints_data):
+    """Format the key points section of a learning package"""
+    return {
+        "points": keypoints_data.get('keypoints', []),
+        "total": len(keypoints_data.get('keypoints', []))
+    }
+
+
+def question_id(question):
+    """
+    Stable short ID of a quiz question
+    
+    Derived from the normalized question text, options and correct answer,
+    so the same question gets the same ID in the stored quiz and in the
+    question bank, while a variant with reordered options does not.
+    
+    Args:
+        question (dict): Question with question, options and correct_answer
+        
+    Returns:
+        str: 12-character hex ID
+    """
+    def normalize(text):
+        return " ".join(re.findall(r'\w+', unicodedata.normalize('NFKC', str(text)).casefold()))
+
+    parts = [normalize(question['question'])]
+    parts.extend(f"{letter}={normalize(text)}" for letter, text in question.get('options', {}).items())
+    parts.append(str(question.get('correct_answer', '')).strip().upper())
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()[:12]
+
+
+def format_quiz(quiz_data):
+    """Format the quiz section of a learning package"""
+    return {
+        "questions": [
+            question if 'id' in question else dict(question, id=question_id(question))
+            for question in quiz_data.get('quiz', [])
+        ],
+        "total_questions": len(quiz_data.get('quiz', []))
+    }
+
+
+# Artifact name -> (package section key, section formatter)
+ARTIFACT_SECTIONS = {
+    "summary": ("summary", format_summary),
+    "keypoints": ("key_points", format_keypoints),
+    "quiz": ("quiz", format_quiz)
+}
+
+
+def format_artifact_response(video_id, name, artifact_data):
+    """
+    Format a response carrying a single regenerated artifact
+    
+    Args:
+        video_id (str): YouTube video ID
+        name (str): Artifact name ("summary", "keypoints" or "quiz")
+        artifact_data (dict): Artifact content
+        
+    Returns:
+        dict: Response with the artifact in the same shape as in the full package
+    """
+    section_key, section_formatter = ARTIFACT_SECTIONS[name]
+    return {
+        "success": True,
+        "video_id": video_id,
+        "generated_at": datetime.now().isoformat(),
+        section_key: section_formatter(artifact_data)
+    }
+
+
 def format_error_response(error_message, stage="unknown"):
     """
     Format error response
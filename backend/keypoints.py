@@ -10,15 +10,19 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from backend.ai_engine import get_ai_engine
+from backend.transcript import transcript_text
 from models.prompts import KEYPOINTS_PROMPT
 
 
+TRANSCRIPT_CHARS = 8000   # Transcript characters sent to the model
+
+
 def generate_keypoints(transcript):
     """
     Generate key learning points from transcript using AI
     
     Args:
-        transcript (str): Video transcript text
+        transcript (Transcript or str): Video transcript
         
     Returns:
         dict: Dictionary containing success status and key points list
@@ -28,13 +32,15 @@ def generate_keypoints(transcript):
         ai_engine = get_ai_engine()
         
         # Prepare prompt
-        prompt = KEYPOINTS_PROMPT.format(transcript=transcript[:8000])  # Limit to 8000 chars
+        transcript = transcript_text(transcript)
+        prompt = KEYPOINTS_PROMPT.format(transcript=transcript[:TRANSCRIPT_CHARS])
         
         # Generate key points
         result = ai_engine.generate_response(
             prompt=prompt,
             max_tokens=600,
-            temperature=0.5
+            temperature=0.5,
+            stage="keypoints"
         )
         
         if result['success']:
@@ -68,7 +74,10 @@ def generate_keypoints(transcript):
             
             return {
                 "success": True,
-                "keypoints": keypoints_list[:8]  # Max 8 points
+                "keypoints": keypoints_list[:8],  # Max 8 points
+                "tokens_used": result.get('tokens_used'),
+                "model": result.get('model'),
+                "truncated": result.get('truncated', False)
             }
         else:
             return {
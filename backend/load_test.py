@@ -0,0 +1,501 @@
+"""
+Load Test Harness
+Drives /api/process at fixed arrival rates against local YouTube and OpenAI stand-ins
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+import urllib.request
+import urllib.error
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of an unsorted list (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _summarize(values):
+    """Count and latency percentiles of a list of seconds"""
+    return {
+        "count": len(values),
+        "p50": _round(_percentile(values, 50)),
+        "p95": _round(_percentile(values, 95)),
+        "p99": _round(_percentile(values, 99)),
+        "max": _round(max(values) if values else None)
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+class Behaviour:
+    """
+    Latency, error and rate limit settings of one stand-in server
+
+    Args:
+        latency (float): Mean response time in seconds
+        jitter (float): Response time varies uniformly by +/- this many seconds
+        error_rate (float): Share of requests answered with a server error
+        rate_limit (float): Requests per second allowed (0 = unlimited); above it
+            the server answers 429
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self.counts = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+
+    def admit(self):
+        """Decide the outcome of one request ("ok", "error" or "rate_limited")"""
+        with self._lock:
+            self.counts["requests"] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+                self._refilled = now
+                if self._tokens < 1:
+                    self.counts["rate_limited"] += 1
+                    return "rate_limited"
+                self._tokens -= 1
+            if random.random() < self.error_rate:
+                self.counts["errors"] += 1
+                return "error"
+            return "ok"
+
+
+    def delay(self):
+        """Sleep for one simulated response time"""
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+
+def _fake_segments(video_id, count):
+    """Deterministic caption segments for a video"""
+    rng = random.Random(video_id)
+    words = ("model", "data", "network", "gradient", "layer", "training", "loss", "feature",
+             "vector", "function", "example", "error", "learning", "weight", "input", "output")
+    return [
+        {
+            "text": " ".join(rng.choice(words) for _ in range(rng.randint(6, 14))),
+            "start": index * 3.0,
+            "duration": 3.2
+        }
+        for index in range(count)
+    ]
+
+
+def _fake_completion(prompt, max_tokens):
+    """Completion text in the format the parsers expect"""
+    if "multiple-choice" in prompt:
+        count = 15 if "question bank" in prompt else 10
+        text = "\n\n".join(
+            f"Question {i}: Which statement about topic {i} is correct?\n"
+            f"A) Option one\nB) Option two\nC) Option three\nD) Option four\n"
+            f"Correct Answer: {'ABCD'[i % 4]}"
+            for i in range(1, count + 1)
+        )
+    else:
+        text = "\n".join(f"{i}. Key idea number {i} explained in one sentence." for i in range(1, 8))
+    completion_tokens = min(max_tokens, len(text) // 4)
+    return text, completion_tokens
+
+
+def _handler(behaviour, respond):
+    """Request handler class applying a Behaviour before calling respond(handler, body)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, payload, headers=None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            outcome = behaviour.admit()
+            if outcome == "rate_limited":
+                self._reply(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                            "code": "rate_limit_exceeded"}},
+                            {"Retry-After": "1"})
+                return
+            behaviour.delay()
+            if outcome == "error":
+                self._reply(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+                return
+            status, payload = respond(self, body)
+            self._reply(status, payload)
+
+        do_GET = _handle
+        do_POST = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_youtube_stand_in(behaviour, segments=400):
+    """
+    Serve GET /transcript/<video_id> with generated caption segments
+
+    Returns:
+        ThreadingHTTPServer: Running server
+    """
+    def respond(handler, body):
+        video_id = handler.path.rstrip('/').split('/')[-1].split('?')[0]
+        return 200, _fake_segments(video_id, segments)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(behaviour, respond))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_openai_stand_in(behaviour):
+    """
+    Serve POST /v1/chat/completions with OpenAI-shaped responses
+
+    Returns:
+        ThreadingHTTPServer: Running server
+    """
+    def respond(handler, body):
+        request = json.loads(body or b"{}")
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        text, completion_tokens = _fake_completion(prompt, request.get("max_tokens") or 1000)
+        prompt_tokens = sum(len(message.get("content", "")) for message in request.get("messages", [])) // 4
+        return 200, {
+            "id": f"chatcmpl-{random.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(behaviour, respond))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def transcript_api_shim(base_url):
+    """
+    Stand-in for YouTubeTranscriptApi that fetches from the local server
+
+    Args:
+        base_url (str): URL of the YouTube stand-in
+
+    Returns:
+        class: Class with the get_transcript() static method used by youtube_service
+    """
+    class StandInTranscriptApi:
+        @staticmethod
+        def get_transcript(video_id, languages=None):
+            with urllib.request.urlopen(f"{base_url}/transcript/{video_id}", timeout=30) as response:
+                return json.loads(response.read())
+
+    return StandInTranscriptApi
+
+
+def sandbox_app(data_dir, youtube_url, openai_url):
+    """
+    Import the Flask app wired to the stand-ins, with all data under data_dir
+
+    Returns:
+        Flask: The app
+    """
+    os.environ['OPENAI_API_KEY'] = 'load-test'
+    os.environ['OPENAI_BASE_URL'] = openai_url
+    os.environ['CATALOG_PATH'] = os.path.join(data_dir, 'catalog.db')
+    os.environ['PREFETCH_CONCURRENCY'] = '1'
+    # The load generator stands in for a gateway, so its X-Client-Id values count as clients
+    os.environ['TRUSTED_PROXIES'] = '127.0.0.1'
+
+    from backend import youtube_service, artifact_store, pipeline, vector_index
+    youtube_service.TRANSCRIPTS_DIR = os.path.join(data_dir, 'transcripts')
+    artifact_store.ARTIFACTS_DIR = os.path.join(data_dir, 'artifacts')
+    pipeline.PACKAGES_DIR = os.path.join(data_dir, 'packages')
+    vector_index.INDEX_DIR = os.path.join(data_dir, 'indexes')
+    youtube_service.YouTubeTranscriptApi = transcript_api_shim(youtube_url)
+
+    from backend.app import app
+    return app
+
+
+def run_step(base_url, rate, duration, video_pool, clients, timeout, max_inflight, run_tag):
+    """
+    Send /api/process requests at a fixed arrival rate (open loop)
+
+    Arrivals do not wait for earlier responses, so a slow server builds a
+    backlog just as it would with real users.
+
+    Args:
+        base_url (str): URL of the app under test
+        rate (float): Requests per second
+        duration (float): Seconds to keep sending
+        video_pool (int): Distinct videos to cycle through (0 = a new video every request)
+        clients (int): Distinct X-Client-Id values
+        timeout (float): Client timeout per request
+        max_inflight (int): Arrivals beyond this many open requests are dropped
+        run_tag (str): 4-character prefix that keeps video IDs unique per step
+
+    Returns:
+        list: One result dict per request
+    """
+    results = []
+    lock = threading.Lock()
+    inflight = threading.Semaphore(max_inflight)
+    threads = []
+
+    def send(index):
+        video_number = index % video_pool if video_pool else index
+        video_id = f"{run_tag}{video_number:07d}"
+        body = json.dumps({"youtube_url": f"https://www.youtube.com/watch?v={video_id}"}).encode('utf-8')
+        request = urllib.request.Request(
+            f"{base_url}/api/process", data=body, method="POST",
+            headers={"Content-Type": "application/json", "X-Client-Id": f"load-{index % clients}"}
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                status, payload = response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            status = e.code
+            try:
+                payload = json.loads(e.read())
+            except Exception:
+                payload = {}
+        except Exception as e:
+            status, payload = 0, {"error": str(e), "stage": "client"}
+        finally:
+            inflight.release()
+
+        result = {"status": status, "latency": time.perf_counter() - started}
+        if status == 200:
+            result["processing"] = payload.get("processing")
+        else:
+            result["error_stage"] = payload.get("stage", "unknown")
+        with lock:
+            results.append(result)
+
+    interval = 1.0 / rate
+    step_started = time.perf_counter()
+    index = 0
+    dropped = 0
+    while True:
+        due = step_started + index * interval
+        if due - step_started >= duration:
+            break
+        time.sleep(max(0.0, due - time.perf_counter()))
+        if inflight.acquire(blocking=False):
+            thread = threading.Thread(target=send, args=(index,), daemon=True)
+            thread.start()
+            threads.append(thread)
+        else:
+            dropped += 1
+        index += 1
+
+    for thread in threads:
+        thread.join(timeout)
+
+    results.extend({"status": -1, "latency": None, "error_stage": "dropped"} for _ in range(dropped))
+    return results
+
+
+def summarize_step(rate, duration, results, wall_seconds):
+    """
+    Aggregate one step into report figures
+
+    Returns:
+        dict: Throughput, latency percentiles per stage and error rates
+    """
+    ok = [r for r in results if r["status"] == 200]
+    failed = [r for r in results if r["status"] != 200]
+
+    stages = {}
+    queue_wait = []
+    for result in ok:
+        processing = result.get("processing") or {}
+        for stage in processing.get("stages", []):
+            stages.setdefault(stage["stage"], []).append(stage["seconds"])
+        if "total_seconds" in processing:
+            queue_wait.append(max(0.0, result["latency"] - processing["total_seconds"]))
+
+    errors = {}
+    for result in failed:
+        key = f"{result['status']}:{result.get('error_stage', 'unknown')}"
+        errors[key] = errors.get(key, 0) + 1
+
+    return {
+        "rate": rate,
+        "duration": duration,
+        "sent": len(results),
+        "succeeded": len(ok),
+        "throughput": round(len(ok) / wall_seconds, 3) if wall_seconds else None,
+        "error_rate": round(len(failed) / len(results), 4) if results else None,
+        "errors": errors,
+        "latency": {
+            "total": _summarize([r["latency"] for r in ok]),
+            "queue_wait": _summarize(queue_wait),
+            **{name: _summarize(values) for name, values in stages.items()}
+        },
+        "tokens": sum((r.get("processing") or {}).get("total_tokens", 0) for r in ok)
+    }
+
+
+def format_report(report, baseline=None):
+    """
+    Render a report as a text table, with changes against a baseline report
+
+    Returns:
+        str: Report text
+    """
+    baseline_steps = {step["rate"]: step for step in (baseline or {}).get("steps", [])}
+    lines = [f"Load test {report['started_at']}  (config: {json.dumps(report['config'], sort_keys=True)})"]
+
+    for step in report["steps"]:
+        before = baseline_steps.get(step["rate"])
+        lines.append("")
+        lines.append(f"Rate {step['rate']}/s for {step['duration']}s: sent {step['sent']}, "
+                     f"ok {step['succeeded']}, throughput {step['throughput']}/s, "
+                     f"error rate {step['error_rate']}"
+                     + (f" (baseline {before['throughput']}/s, {before['error_rate']})" if before else ""))
+        if step["errors"]:
+            lines.append("  errors: " + ", ".join(f"{key} x{count}" for key, count in sorted(step["errors"].items())))
+        lines.append(f"  {'stage':<12}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+                     + (f"{'p95 Δ':>10}" if before else ""))
+        for name, figures in step["latency"].items():
+            row = f"  {name:<12}{figures['count']:>7}" + "".join(
+                f"{'-' if figures[key] is None else figures[key]:>9}" for key in ("p50", "p95", "p99", "max")
+            )
+            old = (before or {}).get("latency", {}).get(name)
+            if old and old["p95"] is not None and figures["p95"] is not None:
+                row += f"{figures['p95'] - old['p95']:>+10.3f}"
+            lines.append(row)
+
+    lines.append("")
+    for name, counts in report["stand_ins"].items():
+        lines.append(f"{name} stand-in: " + ", ".join(f"{key} {value}" for key, value in counts.items()))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/process against local stand-ins")
+    parser.add_argument("--rates", default="1,5,10", help="comma-separated arrival rates (requests/s)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per rate")
+    parser.add_argument("--videos", type=int, default=0, help="distinct videos to cycle through (0 = all new)")
+    parser.add_argument("--clients", type=int, default=50, help="distinct X-Client-Id values")
+    parser.add_argument("--segments", type=int, default=400, help="caption segments per video")
+    parser.add_argument("--yt-latency", type=float, default=0.3)
+    parser.add_argument("--yt-jitter", type=float, default=0.1)
+    parser.add_argument("--yt-error-rate", type=float, default=0.0)
+    parser.add_argument("--yt-rate-limit", type=float, default=0.0)
+    parser.add_argument("--ai-latency", type=float, default=1.5)
+    parser.add_argument("--ai-jitter", type=float, default=0.5)
+    parser.add_argument("--ai-error-rate", type=float, default=0.0)
+    parser.add_argument("--ai-rate-limit", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--max-inflight", type=int, default=1000)
+    parser.add_argument("--report", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own log output")
+    args = parser.parse_args()
+
+    youtube = Behaviour(args.yt_latency, args.yt_jitter, args.yt_error_rate, args.yt_rate_limit)
+    openai_behaviour = Behaviour(args.ai_latency, args.ai_jitter, args.ai_error_rate, args.ai_rate_limit)
+    youtube_server = start_youtube_stand_in(youtube, args.segments)
+    openai_server = start_openai_stand_in(openai_behaviour)
+
+    data_dir = tempfile.mkdtemp(prefix="load-test-")
+    app = sandbox_app(
+        data_dir,
+        f"http://127.0.0.1:{youtube_server.server_port}",
+        f"http://127.0.0.1:{openai_server.server_port}/v1"
+    )
+
+    from werkzeug.serving import make_server
+    if not args.verbose:
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app_server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=app_server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{app_server.server_port}"
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec='seconds'),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("report", "compare", "verbose")},
+        "steps": []
+    }
+
+    try:
+        for step_number, rate in enumerate(float(rate) for rate in args.rates.split(",")):
+            print(f"Running {rate}/s for {args.duration}s...")
+            started = time.perf_counter()
+            with contextlib.ExitStack() as stack:
+                if not args.verbose:
+                    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+                results = run_step(base_url, rate, args.duration, args.videos, args.clients,
+                                   args.timeout, args.max_inflight, f"lt{step_number:02d}")
+            report["steps"].append(summarize_step(rate, args.duration, results,
+                                                  time.perf_counter() - started))
+    finally:
+        app_server.shutdown()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report["stand_ins"] = {"youtube": youtube.counts, "openai": openai_behaviour.counts}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print()
+    print(format_report(report, baseline))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
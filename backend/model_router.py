@@ -0,0 +1,205 @@
+"""
+Model Router
+Chooses the model and max_tokens for each AI call and learns from observed usage
+"""
+
+import os
+import math
+import random
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+PRIMARY_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+FAST_MODEL = os.getenv('OPENAI_FAST_MODEL', PRIMARY_MODEL)
+
+# Stage -> input size buckets: (upper bound in prompt characters, max_tokens ceiling)
+# The last bucket has no upper bound. Ceilings match the old fixed values.
+POLICY_TABLE = {
+    "summary": [(3000, 500), (None, 800)],
+    "keypoints": [(3000, 400), (None, 600)],
+    "quiz": [(3000, 1400), (None, 2000)],
+    "ask": [(None, 400)],
+}
+
+# Latency target -> seconds allowed per call and models in order of preference
+LATENCY_POLICY = {
+    "interactive": {"target_seconds": float(os.getenv('ROUTER_INTERACTIVE_TARGET', '15')),
+                    "models": [PRIMARY_MODEL, FAST_MODEL]},
+    "bulk": {"target_seconds": float(os.getenv('ROUTER_BULK_TARGET', '90')),
+             "models": [PRIMARY_MODEL, FAST_MODEL]},
+}
+
+MIN_SAMPLES = 20          # Observations needed before max_tokens is tightened
+HEADROOM = 1.25           # Learned budget = p95 completion tokens * HEADROOM + SLACK
+SLACK = 32
+MIN_TOKENS = 128          # Never tighten below this
+MAX_TRUNCATION_RATE = 0.05  # Above this share of cut-off answers, fall back to the ceiling
+WINDOW = 200              # Observations kept per stage/model/ceiling
+LATENCY_MAX_AGE = 600     # Seconds a latency observation counts for model choice
+EXPLORE_SHARE = 0.05      # Share of calls sent to a preferred model that missed the target
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class ModelRouter:
+    """
+    Routes AI calls using the policy tables and recent observations
+
+    For every stage the router looks up the max_tokens ceiling by prompt
+    size and the model by latency target. Completion lengths observed for
+    the same stage, model and ceiling then shrink max_tokens towards what
+    the model actually writes, which shortens the worst-case completion.
+
+    A preferred model that misses its latency target still gets
+    EXPLORE_SHARE of the calls, and latencies older than LATENCY_MAX_AGE
+    are ignored, so the model is used again once it has recovered.
+    """
+
+    def __init__(self, policy_table=None, latency_policy=None):
+        self.policy_table = policy_table or POLICY_TABLE
+        self.latency_policy = latency_policy or LATENCY_POLICY
+        self._lock = threading.Lock()
+        self._completions = {}   # (stage, model, ceiling) -> deque of (completion_tokens, truncated)
+        self._latencies = {}     # (stage, model) -> deque of (monotonic time, seconds)
+
+
+    def ceiling(self, stage, prompt_chars, requested_max_tokens):
+        """Policy max_tokens for a stage and prompt size"""
+        for upper_bound, max_tokens in self.policy_table.get(stage, []):
+            if upper_bound is None or prompt_chars <= upper_bound:
+                return min(max_tokens, requested_max_tokens)
+        return requested_max_tokens
+
+
+    def _recent_latencies(self, stage, model):
+        """Latencies of a stage and model observed within LATENCY_MAX_AGE (caller holds the lock)"""
+        cutoff = time.monotonic() - LATENCY_MAX_AGE
+        return [seconds for observed_at, seconds in self._latencies.get((stage, model), ())
+                if observed_at >= cutoff]
+
+
+    def choose_model(self, stage, latency_target):
+        """
+        First preferred model that meets the latency target
+
+        A model without MIN_SAMPLES recent observations counts as meeting
+        it, so it is tried until its latency is known.
+        """
+        policy = self.latency_policy.get(latency_target, self.latency_policy["interactive"])
+        models = list(dict.fromkeys(policy["models"]))
+
+        with self._lock:
+            observed = {}
+            for model in models:
+                samples = self._recent_latencies(stage, model)
+                if len(samples) < MIN_SAMPLES:
+                    chosen = model
+                    break
+                observed[model] = _percentile(samples, 95)
+                if observed[model] <= policy["target_seconds"]:
+                    chosen = model
+                    break
+            else:
+                chosen = min(observed, key=observed.get)
+
+        # Keep measuring the preferred models that were passed over
+        demoted = models[:models.index(chosen)]
+        if demoted and random.random() < EXPLORE_SHARE:
+            return random.choice(demoted)
+        return chosen
+
+
+    def route(self, stage, prompt_chars, requested_max_tokens, latency_target="interactive"):
+        """
+        Pick model and max_tokens for one call
+
+        Args:
+            stage (str): Pipeline stage (e.g. "summary", "keypoints", "quiz")
+            prompt_chars (int): Length of the prompt in characters
+            requested_max_tokens (int): max_tokens asked for by the caller (upper limit)
+            latency_target (str): "interactive" or "bulk"
+
+        Returns:
+            dict: model, max_tokens and the ceiling they were derived from
+        """
+        model = self.choose_model(stage, latency_target)
+        ceiling = self.ceiling(stage, prompt_chars, requested_max_tokens)
+        max_tokens = ceiling
+
+        with self._lock:
+            samples = self._completions.get((stage, model, ceiling))
+            if samples and len(samples) >= MIN_SAMPLES:
+                truncation_rate = sum(1 for _, truncated in samples if truncated) / len(samples)
+                if truncation_rate <= MAX_TRUNCATION_RATE:
+                    p95 = _percentile([tokens for tokens, _ in samples], 95)
+                    learned = int(p95 * HEADROOM) + SLACK
+                    max_tokens = max(min(MIN_TOKENS, ceiling), min(ceiling, learned))
+
+        return {"model": model, "max_tokens": max_tokens, "ceiling": ceiling}
+
+
+    def observe(self, stage, model, ceiling, completion_tokens, truncated, latency):
+        """
+        Record the outcome of a call
+
+        Args:
+            stage (str): Pipeline stage
+            model (str): Model that was used
+            ceiling (int): Ceiling returned by route()
+            completion_tokens (int): Tokens in the completion
+            truncated (bool): True if the answer hit max_tokens
+            latency (float): Call duration in seconds
+        """
+        with self._lock:
+            self._completions.setdefault(
+                (stage, model, ceiling), deque(maxlen=WINDOW)
+            ).append((completion_tokens, truncated))
+            self._latencies.setdefault((stage, model), deque(maxlen=WINDOW)).append(
+                (time.monotonic(), latency))
+
+
+    def stats(self):
+        """
+        Observed usage per stage and model
+
+        Returns:
+            dict: Statistics keyed by "stage/model"
+        """
+        with self._lock:
+            stats = {}
+            for (stage, model, ceiling), samples in self._completions.items():
+                tokens = [t for t, _ in samples]
+                latencies = self._recent_latencies(stage, model) or [0.0]
+                stats[f"{stage}/{model}/{ceiling}"] = {
+                    "samples": len(samples),
+                    "completion_tokens_p50": _percentile(tokens, 50),
+                    "completion_tokens_p95": _percentile(tokens, 95),
+                    "truncated": sum(1 for _, truncated in samples if truncated),
+                    "latency_p95": round(_percentile(latencies, 95), 3)
+                }
+            return stats
+
+
+# Global router instance
+model_router = None
+_router_lock = threading.Lock()
+
+def get_model_router():
+    """Get or create model router instance"""
+    global model_router
+    if model_router is None:
+        with _router_lock:
+            if model_router is None:
+                model_router = ModelRouter()
+    return model_router
@@ -0,0 +1,273 @@
+"""
+Learning Package Pipeline
+Runs transcript extraction and all AI generation steps for one video
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.youtube_service import get_transcript, get_transcript_cached
+from backend.summarizer import generate_summary
+from backend.keypoints import generate_keypoints
+from backend.quiz_generator import generate_quiz
+from backend.artifact_store import save_artifact, load_artifact
+from backend.vector_index import drop_index
+from backend.catalog import get_catalog
+from backend.formatter import (format_learning_package, format_artifact_response,
+                               format_error_response, save_learning_package)
+
+
+# Saved learning packages: data/packages/<video_id>.json
+PACKAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'packages')
+
+
+# Artifact name -> (generator function, error stage, progress message)
+ARTIFACT_GENERATORS = {
+    "summary": (generate_summary, "summary_generation", "Generating summary..."),
+    "keypoints": (generate_keypoints, "keypoints_generation", "Generating key points..."),
+    "quiz": (generate_quiz, "quiz_generation", "Generating quiz questions...")
+}
+
+
+def build_artifact(video_id, name, transcript, refresh=False):
+    """
+    Get one artifact from the store, generating and storing it if needed
+
+    Args:
+        video_id (str): YouTube video ID
+        name (str): Artifact name ("summary", "keypoints" or "quiz")
+        transcript (Transcript): Video transcript
+        refresh (bool): Ignore the stored copy and regenerate
+
+    Returns:
+        tuple: (generator result dict, True if it came from the store)
+    """
+    if not refresh:
+        stored = load_artifact(video_id, name)
+        if stored:
+            print(f"✓ Using stored {name} for video: {video_id}")
+            return stored, True
+
+    generator, _, message = ARTIFACT_GENERATORS[name]
+    print(message)
+    result = generator(transcript)
+
+    if result['success'] and not result.get('truncated'):
+        save_artifact(video_id, name, result)
+    elif result['success']:
+        print(f"⚠ Warning: {name} for video {video_id} was cut off at max_tokens; not storing it")
+
+    return result, False
+
+
+def write_package(video_id, transcript_result, learning_package):
+    """
+    Save the learning package file of a video
+
+    Args:
+        video_id (str): YouTube video ID
+        transcript_result (dict): Transcript result the package was built from
+        learning_package (dict): Package from format_learning_package
+
+    Returns:
+        dict: Package details for the catalog (generated_at, language,
+            word_count, path), or None if the file could not be written
+    """
+    os.makedirs(PACKAGES_DIR, exist_ok=True)
+    package_path = os.path.join(PACKAGES_DIR, f"{video_id}.json")
+    if not save_learning_package(learning_package, package_path):
+        return None
+    return {
+        "generated_at": learning_package['generated_at'],
+        "language": transcript_result.get('language'),
+        "word_count": transcript_result.get('word_count'),
+        "path": package_path
+    }
+
+
+def record_run(kind, video_id, started_at, clock, stages, response, status, package=None):
+    """
+    Record a finished run in the catalog without letting catalog errors fail the request
+
+    Args:
+        kind (str): "package" or artifact name
+        video_id (str): YouTube video ID, None if unknown
+        started_at (datetime): Run start time
+        clock (float): time.perf_counter() at run start
+        stages (list): Stage timing dicts
+        response (dict): Response that is returned to the client
+        status (int): HTTP status code of the response
+        package (dict): Saved package details for successful package runs
+    """
+    try:
+        get_catalog().record_run(
+            video_id, kind,
+            "success" if status == 200 else "failed",
+            started_at,
+            time.perf_counter() - clock,
+            stages,
+            error=response.get('error'),
+            error_stage=response.get('stage'),
+            package=package
+        )
+    except Exception as e:
+        print(f"⚠ Warning: Could not record run in catalog: {str(e)}")
+
+
+def _stage(name, started, result=None, cached=False):
+    """Build a stage timing record"""
+    result = result or {}
+    return {
+        "stage": name,
+        "seconds": time.perf_counter() - started,
+        "tokens": None if cached else result.get('tokens_used'),
+        "model": None if cached else result.get('model'),
+        "cached": cached
+    }
+
+
+def run_pipeline(youtube_url, refresh=False, rewrite_package=False):
+    """
+    Process a YouTube video and build its complete learning package
+
+    Stored transcripts and artifacts are reused; only missing parts are
+    generated.
+
+    Args:
+        youtube_url (str): YouTube video URL
+        refresh (bool): Fetch the transcript again and regenerate every artifact
+        rewrite_package (bool): Save the package file and catalog row even if every stage was cached
+
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    started_at, clock = datetime.now(), time.perf_counter()
+    stages = []
+
+    def finish(response, status, video_id=None, package=None):
+        # Timings and token usage of this run, failed runs included (not part of the saved package file)
+        response["processing"] = {
+            "total_seconds": round(time.perf_counter() - clock, 3),
+            "total_tokens": sum(stage['tokens'] or 0 for stage in stages),
+            "stages": [dict(stage, seconds=round(stage['seconds'], 3)) for stage in stages]
+        }
+        record_run("package", video_id, started_at, clock, stages, response, status, package)
+        return response, status
+
+    # Step 1: Extract transcript
+    print(f"Extracting transcript for: {youtube_url}")
+    step_started = time.perf_counter()
+    if refresh:
+        transcript_result = get_transcript(youtube_url)
+    else:
+        transcript_result = get_transcript_cached(youtube_url)
+    stages.append(_stage("transcript", step_started, cached=transcript_result.get('from_cache', False)))
+
+    if not transcript_result['success']:
+        return finish(format_error_response(
+            transcript_result.get('error', 'Transcript extraction failed'),
+            "transcript_extraction"
+        ), 400)
+
+    video_id = transcript_result['video_id']
+    transcript = transcript_result['transcript']
+
+    if refresh:
+        # The Q&A index was built from the old transcript
+        drop_index(video_id)
+
+    # Steps 2-4: Summary, key points and quiz
+    results = {}
+    for name, (_, stage, _) in ARTIFACT_GENERATORS.items():
+        step_started = time.perf_counter()
+        result, cached = build_artifact(video_id, name, transcript, refresh)
+        stages.append(_stage(name, step_started, result, cached))
+
+        if not result['success']:
+            return finish(format_error_response(
+                result.get('error', f'{name} generation failed'),
+                stage
+            ), 500, video_id)
+
+        results[name] = result
+
+    # Step 5: Format complete package
+    learning_package = format_learning_package(
+        video_id,
+        transcript_result,
+        results['summary'],
+        results['keypoints'],
+        results['quiz']
+    )
+
+    # Save the package file when anything in it was (re)generated. Only then
+    # is the catalog's package row updated, so cache hits keep its run_id.
+    package = None
+    package_path = os.path.join(PACKAGES_DIR, f"{video_id}.json")
+    if rewrite_package or not all(stage['cached'] for stage in stages) or not os.path.exists(package_path):
+        package = write_package(video_id, transcript_result, learning_package)
+
+    print(f"Successfully generated learning package for video: {video_id}")
+    return finish(learning_package, 200, video_id, package)
+
+
+def run_artifact(youtube_url, name):
+    """
+    Regenerate a single artifact, reusing the stored transcript
+
+    When the other artifacts are stored too, the saved package file and
+    its catalog row are updated with the new artifact.
+
+    Args:
+        youtube_url (str): YouTube video URL or video ID
+        name (str): Artifact name ("summary", "keypoints" or "quiz")
+
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    started_at, clock = datetime.now(), time.perf_counter()
+    stages = []
+
+    def finish(response, status, video_id=None, package=None):
+        record_run(name, video_id, started_at, clock, stages, response, status, package)
+        return response, status
+
+    step_started = time.perf_counter()
+    transcript_result = get_transcript_cached(youtube_url)
+    stages.append(_stage("transcript", step_started, cached=transcript_result.get('from_cache', False)))
+
+    if not transcript_result['success']:
+        return finish(format_error_response(
+            transcript_result.get('error', 'Transcript extraction failed'),
+            "transcript_extraction"
+        ), 400)
+
+    video_id = transcript_result['video_id']
+    step_started = time.perf_counter()
+    result, _ = build_artifact(video_id, name, transcript_result['transcript'], refresh=True)
+    stages.append(_stage(name, step_started, result))
+
+    if not result['success']:
+        return finish(format_error_response(
+            result.get('error', f'{name} generation failed'),
+            ARTIFACT_GENERATORS[name][1]
+        ), 500, video_id)
+
+    package = None
+    stored = {other: load_artifact(video_id, other) for other in ARTIFACT_GENERATORS if other != name}
+    if not result.get('truncated') and all(stored.values()):
+        stored[name] = result
+        package = write_package(video_id, transcript_result, format_learning_package(
+            video_id,
+            transcript_result,
+            stored['summary'],
+            stored['keypoints'],
+            stored['quiz']
+        ))
+
+    return finish(format_artifact_response(video_id, name, result), 200, video_id, package)
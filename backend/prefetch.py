@@ -0,0 +1,341 @@
+"""
+Prefetch Scheduler
+Builds learning packages for upcoming course videos in the background during off-peak hours
+"""
+
+import sys
+import os
+import json
+import time
+import socket
+import threading
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import datetime, date
+from dotenv import load_dotenv
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.youtube_service import extract_video_id, load_saved_transcript
+from backend.artifact_store import load_artifact
+from backend.pipeline import run_pipeline, ARTIFACT_GENERATORS
+from backend.scheduler import get_scheduler, SchedulerRejected
+from backend.catalog import get_catalog
+
+# Load environment variables
+load_dotenv()
+
+
+# Off-peak windows in local time, e.g. "01:00-06:00,22:00-23:59" (empty = always)
+PREFETCH_WINDOWS = os.getenv('PREFETCH_WINDOWS', '01:00-06:00')
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', '2'))
+PREFETCH_DAILY_TOKENS = int(os.getenv('PREFETCH_DAILY_TOKENS', '200000'))
+POLL_SECONDS = 30                # How often idle workers re-check window and budget
+DEFAULT_VIDEO_TOKENS = 6000      # Cost estimate before any video has been prefetched
+CLAIM_TIMEOUT = 3600             # Seconds after which a claimed job of a dead worker is taken over
+# Queue file of older versions, moved into the catalog on start
+QUEUE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'prefetch_queue.json')
+
+# Namespaces used by YouTube playlist/channel feeds
+FEED_NAMESPACES = {"atom": "http://www.w3.org/2005/Atom", "yt": "http://www.youtube.com/xml/schemas/2015"}
+
+# Only YouTube's own feeds are fetched, so the server cannot be pointed at other hosts
+FEED_URL = "https://www.youtube.com/feeds/videos.xml"
+FEED_HOSTS = ("www.youtube.com", "youtube.com")
+FEED_PARAMS = ("playlist_id", "channel_id")
+MAX_FEED_BYTES = 2 * 1024 * 1024
+
+
+def parse_windows(raw):
+    """
+    Parse "HH:MM-HH:MM,..." into a list of (start_minute, end_minute) pairs
+
+    Args:
+        raw (str): Window specification
+
+    Returns:
+        list: Windows in minutes since midnight; a window may wrap past midnight
+    """
+    windows = []
+    for item in (raw or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        start, end = item.split("-")
+        start_h, start_m = (int(part) for part in start.split(":"))
+        end_h, end_m = (int(part) for part in end.split(":"))
+        windows.append((start_h * 60 + start_m, end_h * 60 + end_m))
+    return windows
+
+
+def in_window(windows, now=None):
+    """True if `now` falls in any of the windows (no windows = always)"""
+    if not windows:
+        return True
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    for start, end in windows:
+        if start <= end and start <= minute < end:
+            return True
+        if start > end and (minute >= start or minute < end):
+            return True
+    return False
+
+
+def feed_url_for(playlist_id=None, channel_id=None):
+    """
+    Build the YouTube Atom feed URL of a playlist or channel
+
+    Returns:
+        str: Feed URL
+    """
+    if playlist_id:
+        return f"{FEED_URL}?{urllib.parse.urlencode({'playlist_id': playlist_id})}"
+    if channel_id:
+        return f"{FEED_URL}?{urllib.parse.urlencode({'channel_id': channel_id})}"
+    raise ValueError("Provide a playlist_id or channel_id")
+
+
+def check_feed_url(feed_url):
+    """
+    Reject feed URLs that are not a YouTube playlist/channel feed
+
+    Raises:
+        ValueError: If the URL is not https://www.youtube.com/feeds/videos.xml
+            with a playlist_id or channel_id
+    """
+    parsed = urllib.parse.urlsplit(feed_url)
+    query = urllib.parse.parse_qs(parsed.query)
+    if parsed.scheme != "https" or parsed.hostname not in FEED_HOSTS \
+            or parsed.port is not None or parsed.username or parsed.password \
+            or parsed.path != "/feeds/videos.xml" or not any(query.get(key) for key in FEED_PARAMS):
+        raise ValueError(f"Only YouTube playlist or channel feeds are supported ({FEED_URL}?playlist_id=...)")
+
+
+class _FeedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows redirects only to other YouTube feed URLs"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_feed_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def read_feed(feed_url):
+    """
+    Read video IDs from a YouTube playlist/channel Atom feed
+
+    Args:
+        feed_url (str): Feed URL (https://www.youtube.com/feeds/videos.xml?playlist_id=...)
+
+    Returns:
+        list: Video IDs
+
+    Raises:
+        ValueError: If the URL is not a YouTube feed
+    """
+    check_feed_url(feed_url)
+    opener = urllib.request.build_opener(_FeedRedirectHandler)
+    with opener.open(feed_url, timeout=15) as response:
+        body = response.read(MAX_FEED_BYTES + 1)
+    if len(body) > MAX_FEED_BYTES:
+        raise ValueError("Feed is too large")
+
+    root = ET.fromstring(body)
+    return [
+        element.text for element in root.iterfind('atom:entry/yt:videoId', FEED_NAMESPACES)
+        if element.text
+    ]
+
+
+def is_cached(video_id):
+    """True if the transcript and every artifact of the video are already stored"""
+    return all(load_artifact(video_id, name) for name in ARTIFACT_GENERATORS) \
+        and load_saved_transcript(video_id) is not None
+
+
+class Prefetcher:
+    """
+    Background queue of videos to process ahead of the first student
+
+    The queue, the jobs in progress and the day's token usage live in the
+    catalog, so every worker process shares one queue and one daily
+    budget, and nothing is lost on restart. Each process runs its own
+    worker threads; a worker claims a video in a catalog transaction only
+    inside the off-peak windows and while the budget allows another video.
+    Jobs run in the scheduler's bulk lane, so live student requests still
+    come first.
+    """
+
+    def __init__(self, windows=PREFETCH_WINDOWS, concurrency=PREFETCH_CONCURRENCY,
+                 daily_tokens=PREFETCH_DAILY_TOKENS, queue_file=QUEUE_FILE):
+        self.windows_spec = windows
+        self.windows = parse_windows(windows)
+        self.concurrency = max(1, concurrency)
+        self.daily_tokens = daily_tokens
+
+        self._wakeup = threading.Condition()
+        self._import_queue_file(queue_file)
+
+        self._threads = []
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._worker, name=f"prefetch-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+
+    def add(self, videos):
+        """
+        Queue videos for prefetching
+
+        Args:
+            videos (list): Video URLs or IDs
+
+        Returns:
+            dict: Counts of queued, already queued/running and invalid entries
+        """
+        video_ids = []
+        invalid = 0
+        for video in videos:
+            video_id = extract_video_id(str(video))
+            if video_id:
+                video_ids.append(video_id)
+            else:
+                invalid += 1
+
+        queued = get_catalog().prefetch_add(video_ids)
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return {"queued": queued, "duplicate": len(video_ids) - queued, "invalid": invalid}
+
+
+    def status(self):
+        """
+        Current prefetch state (shared by all processes)
+
+        Returns:
+            dict: Window, budget, queue and recent results
+        """
+        shared = get_catalog().prefetch_status(date.today().isoformat(), DEFAULT_VIDEO_TOKENS, CLAIM_TIMEOUT)
+        return {
+            "in_window": in_window(self.windows),
+            "windows": self.windows_spec,
+            "concurrency": self.concurrency,
+            "daily_token_budget": self.daily_tokens,
+            **shared
+        }
+
+
+    def _worker(self):
+        """Claim videos from the shared queue while allowed and process them"""
+        worker = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while True:
+            claim = None
+            if in_window(self.windows):
+                try:
+                    claim = get_catalog().prefetch_claim(
+                        worker, date.today().isoformat(), self.daily_tokens,
+                        DEFAULT_VIDEO_TOKENS, CLAIM_TIMEOUT
+                    )
+                except Exception as e:
+                    print(f"⚠ Warning: Could not claim a prefetch job: {str(e)}")
+
+            if claim is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_SECONDS)
+                continue
+
+            video_id, reserved = claim
+            outcome = self._process(video_id)
+
+            # Failed runs still spent tokens on the stages before the failure;
+            # when that is unknown the reserved estimate is charged
+            tokens = outcome.get('tokens')
+            if tokens is None:
+                tokens = reserved if outcome['status'] == 'failed' else 0
+            try:
+                get_catalog().prefetch_finish(
+                    video_id, worker, date.today().isoformat(), outcome['status'], tokens,
+                    outcome.get('error'), requeue=outcome.get('requeue', False)
+                )
+            except Exception as e:
+                print(f"⚠ Warning: Could not record prefetch result of {video_id}: {str(e)}")
+
+            if outcome.get('requeue'):
+                time.sleep(outcome.get('retry_after', POLL_SECONDS))
+
+
+    def _process(self, video_id):
+        """Run the pipeline for one video in the scheduler's bulk lane"""
+        if is_cached(video_id):
+            return {"status": "cached", "tokens": 0}
+
+        try:
+            ticket = get_scheduler().submit("prefetch", lambda: run_pipeline(video_id), lane="bulk")
+        except SchedulerRejected as e:
+            return {"status": "deferred", "requeue": True, "retry_after": e.retry_after}
+
+        try:
+            response, status = ticket.wait()
+        except Exception as e:
+            return {"status": "failed", "error": str(e), "tokens": None}
+
+        tokens = response.get('processing', {}).get('total_tokens')
+        if status != 200:
+            return {"status": "failed", "error": response.get('error'), "tokens": tokens}
+
+        print(f"✓ Prefetched learning package for video: {video_id}")
+        return {"status": "done", "tokens": tokens or 0}
+
+
+    def _import_queue_file(self, queue_file):
+        """Move a queue saved by an older version (JSON file) into the catalog"""
+        try:
+            with open(queue_file, 'r', encoding='utf-8') as f:
+                video_ids = json.load(f).get('queue', [])
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠ Warning: Could not read prefetch queue: {str(e)}")
+            return
+        get_catalog().prefetch_add(video_ids)
+        try:
+            os.remove(queue_file)
+        except FileNotFoundError:
+            pass
+        print(f"✓ Moved {len(video_ids)} queued videos from {queue_file} into the catalog")
+
+
+# Global prefetcher instance
+prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher():
+    """Get or create prefetcher instance (starts its worker threads)"""
+    global prefetcher
+    if prefetcher is None:
+        with _prefetcher_lock:
+            if prefetcher is None:
+                prefetcher = Prefetcher()
+    return prefetcher
+
+
+if __name__ == "__main__":
+    # Queue the videos listed in a file (one URL per line) and show the status
+    if len(sys.argv) < 2:
+        print("Usage: python prefetch.py <file with one YouTube URL per line>")
+        sys.exit(1)
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    test_prefetcher = get_prefetcher()
+    print(test_prefetcher.add(urls))
+    while True:
+        status = test_prefetcher.status()
+        print(f"in_window={status['in_window']} queued={status['queued']} "
+              f"running={len(status['running'])} tokens_today={status['tokens_used_today']}")
+        if not status['queued'] and not status['running']:
+            break
+        time.sleep(POLL_SECONDS)
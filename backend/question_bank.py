@@ -0,0 +1,547 @@
+"""
+Quiz Question Bank
+Generates a large per-video pool of questions once and serves quizzes from it
+"""
+
+import sys
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.youtube_service import extract_video_id, get_transcript_cached, load_saved_transcript
+from backend.quiz_generator import generate_question_pool
+from backend.artifact_store import save_artifact, load_artifact
+from backend.scheduler import get_scheduler, SchedulerRejected
+from backend.formatter import format_quiz, format_error_response, question_id
+from backend.transcript import transcript_text
+from backend.vector_index import tokenize
+
+# Load environment variables
+load_dotenv()
+
+
+# Bank configuration
+BANK_SIZE = int(os.getenv('QUESTION_BANK_SIZE', '50'))
+LOW_WATERMARK = int(os.getenv('QUESTION_BANK_LOW_WATERMARK', '20'))
+MAX_SERVES = int(os.getenv('QUESTION_BANK_MAX_SERVES', '500'))
+SECTION_CHARS = 6000          # Transcript characters per generation call
+MAX_QUESTIONS_PER_CALL = 15   # Keeps each completion well inside max_tokens
+MAX_CALLS_PER_SECTION = 4     # Generation calls per section in one fill
+DUPLICATE_OVERLAP = 0.8       # Word overlap above which two questions count as the same
+TOP_UP_COOLDOWN = 600         # Minimum seconds between two top-ups of the same bank
+BUILD_RETRY_SECONDS = 5       # Suggested wait for requests arriving during a build
+
+STRATEGIES = ("balanced", "random")
+
+
+def section_spans(transcript, section_chars=SECTION_CHARS):
+    """
+    Character ranges of the sections of a transcript
+
+    Args:
+        transcript (Transcript or str): Full transcript
+        section_chars (int): Target characters per section
+
+    Returns:
+        list: (start, end) positions of the non-empty sections, in order
+    """
+    transcript = transcript_text(transcript)
+    spans = []
+    start = 0
+    while start < len(transcript):
+        end = min(len(transcript), start + section_chars)
+        if end < len(transcript):
+            space = transcript.rfind(' ', start, end)
+            if space > start:
+                end = space
+        if transcript[start:end].strip():
+            spans.append((start, end))
+        start = end
+    return spans
+
+
+def split_sections(transcript, section_chars=SECTION_CHARS):
+    """
+    Split a transcript into sections of roughly equal size on word boundaries
+
+    Args:
+        transcript (Transcript or str): Full transcript
+        section_chars (int): Target characters per section
+
+    Returns:
+        list: List of section strings covering the whole transcript
+    """
+    transcript = transcript_text(transcript)
+    return [transcript[start:end].strip() for start, end in section_spans(transcript, section_chars)]
+
+
+def _question_words(question_text):
+    """Normalized word set of a question, used for duplicate detection"""
+    return frozenset(tokenize(question_text))
+
+
+class QuestionBank:
+    """
+    Question pool of one video
+
+    Every question keeps the transcript section it came from and how often
+    it has been served. Questions served more than MAX_SERVES times are
+    retired from the fresh pool; when the fresh pool drops below the low
+    watermark the bank asks for a top-up. The watermark is LOW_WATERMARK,
+    or half of the bank for short videos that cannot yield BANK_SIZE
+    questions, so such a bank does not start out "low".
+    """
+
+    def __init__(self, video_id, section_count, questions=None):
+        self.video_id = video_id
+        self.section_count = section_count
+        self.questions = []
+        self._words = []
+        self.last_top_up = None
+        self._lock = threading.Lock()
+        for question in questions or []:
+            self._append(question)
+
+
+    def _append(self, question):
+        """Add a question record without duplicate checks"""
+        self.questions.append(question)
+        self._words.append(_question_words(question['question']))
+
+
+    def add(self, questions, section):
+        """
+        Add newly generated questions, skipping duplicates
+
+        Args:
+            questions (list): Parsed quiz questions
+            section (int): Index of the transcript section they came from
+
+        Returns:
+            int: Number of questions actually added
+        """
+        added = 0
+        with self._lock:
+            for question in questions:
+                words = _question_words(question['question'])
+                if not words or any(
+                    len(words & seen) / len(words | seen) >= DUPLICATE_OVERLAP
+                    for seen in self._words
+                ):
+                    continue
+
+                self._append({
+                    "id": question_id(question),
+                    "question": question['question'],
+                    "options": question['options'],
+                    "correct_answer": question['correct_answer'],
+                    "section": section,
+                    "served": 0
+                })
+                added += 1
+        return added
+
+
+    def fresh_questions(self):
+        """Questions that have not been retired yet"""
+        return [q for q in self.questions if q['served'] < MAX_SERVES]
+
+
+    def low_watermark(self):
+        """Fresh questions below which the bank is topped up"""
+        return min(LOW_WATERMARK, len(self.questions) // 2)
+
+
+    def is_low(self):
+        """True if the fresh pool needs a top-up"""
+        return len(self.fresh_questions()) < self.low_watermark()
+
+
+    def needs_top_up(self):
+        """True if the bank is low and has not been topped up recently"""
+        if not self.is_low():
+            return False
+        return self.last_top_up is None or time.monotonic() - self.last_top_up >= TOP_UP_COOLDOWN
+
+
+    def draw(self, count=10, strategy="balanced"):
+        """
+        Pick questions for one quiz
+
+        Args:
+            count (int): Number of questions
+            strategy (str): "balanced" spreads questions across transcript
+                sections, preferring the least served; "random" samples uniformly
+
+        Returns:
+            list: Questions in the same format as generate_quiz output plus "id"
+        """
+        with self._lock:
+            pool = self.fresh_questions()
+            if len(pool) < count:
+                pool = list(self.questions)
+            count = min(count, len(pool))
+
+            if strategy == "random":
+                chosen = random.sample(pool, count)
+            else:
+                by_section = {}
+                for question in pool:
+                    by_section.setdefault(question['section'], []).append(question)
+                for section_questions in by_section.values():
+                    random.shuffle(section_questions)
+                    section_questions.sort(key=lambda q: q['served'])
+
+                sections = list(by_section.values())
+                random.shuffle(sections)
+                chosen = []
+                while len(chosen) < count:
+                    for section_questions in sections:
+                        if section_questions and len(chosen) < count:
+                            chosen.append(section_questions.pop(0))
+
+            for question in chosen:
+                question['served'] += 1
+
+            return [
+                {key: question[key] for key in ("id", "question", "options", "correct_answer")}
+                for question in chosen
+            ]
+
+
+    def stats(self):
+        """Size information about the bank"""
+        return {
+            "size": len(self.questions),
+            "fresh": len(self.fresh_questions()),
+            "low_watermark": self.low_watermark(),
+            "sections": self.section_count
+        }
+
+
+    def to_dict(self):
+        """Serialize the bank for the artifact store"""
+        with self._lock:
+            return {
+                "video_id": self.video_id,
+                "section_count": self.section_count,
+                "updated_at": datetime.now().isoformat(),
+                "questions": [dict(q) for q in self.questions]
+            }
+
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a bank from its stored form"""
+        return cls(data['video_id'], data.get('section_count', 1), data.get('questions', []))
+
+
+# Loaded banks, kept in memory so serving a quiz does not touch the disk
+_banks = {}
+_banks_lock = threading.Lock()
+_top_ups_running = set()
+_builds_running = set()
+
+
+def get_bank(video_id):
+    """
+    Get the question bank of a video from memory or the artifact store
+
+    Args:
+        video_id (str): YouTube video ID
+
+    Returns:
+        QuestionBank: The bank, or None if it has not been built yet
+    """
+    bank = _banks.get(video_id)
+    if bank is None:
+        stored = load_artifact(video_id, 'question_bank')
+        if stored:
+            with _banks_lock:
+                bank = _banks.setdefault(video_id, QuestionBank.from_dict(stored))
+    return bank
+
+
+def _fill_sections(bank, sections, section_indexes, wanted):
+    """
+    Generate questions for the given sections until `wanted` new ones are added
+
+    Sections are visited in passes, since one call yields at most
+    MAX_QUESTIONS_PER_CALL questions. A section drops out when a call for
+    it fails or adds nothing new after duplicate checks, or after
+    MAX_CALLS_PER_SECTION calls.
+
+    Returns:
+        str: Last error message, or None if every call succeeded
+    """
+    error = None
+    active = list(section_indexes)
+    calls = dict.fromkeys(active, 0)
+
+    while wanted > 0 and active:
+        per_section = max(1, -(-wanted // len(active)))
+        for index in list(active):
+            if wanted <= 0:
+                break
+            count = min(MAX_QUESTIONS_PER_CALL, per_section, wanted)
+            result = generate_question_pool(sections[index], count)
+            calls[index] += 1
+            if result['success']:
+                added = bank.add(result['quiz'], index)
+            else:
+                error = result.get('error')
+                added = 0
+            wanted -= added
+            if not added or calls[index] >= MAX_CALLS_PER_SECTION:
+                active.remove(index)
+
+    return error
+
+
+def build_bank(video_id, transcript):
+    """
+    Generate and store a new question bank covering the whole transcript
+
+    Args:
+        video_id (str): YouTube video ID
+        transcript (Transcript or str): Full transcript
+
+    Returns:
+        dict: Dictionary containing success status and the bank
+    """
+    sections = split_sections(transcript)
+    bank = QuestionBank(video_id, len(sections))
+
+    print(f"Building question bank for video {video_id} ({len(sections)} sections)...")
+    error = _fill_sections(bank, sections, list(range(len(sections))), BANK_SIZE)
+
+    if not bank.questions:
+        return {
+            "success": False,
+            "error": error or "No questions could be generated"
+        }
+
+    save_artifact(video_id, 'question_bank', bank.to_dict())
+    with _banks_lock:
+        _banks[video_id] = bank
+
+    print(f"✓ Question bank ready: {len(bank.questions)} questions "
+          f"(low watermark {bank.low_watermark()})")
+    return {
+        "success": True,
+        "bank": bank
+    }
+
+
+def refresh_bank(video_id, transcript, keep):
+    """
+    Update a stored bank after the transcript changed
+
+    Questions from sections whose text is unchanged are kept and moved to
+    the index of the new section holding that text. Questions from changed
+    sections are dropped, and only the changed sections get new questions.
+
+    Args:
+        video_id (str): YouTube video ID
+        transcript (Transcript or str): New transcript
+        keep (dict): Old section index -> new section index for unchanged sections
+
+    Returns:
+        dict: Kept, dropped and added question counts, or None if the video has no bank
+    """
+    bank = get_bank(video_id)
+    if bank is None:
+        return None
+
+    sections = split_sections(transcript)
+    with bank._lock:
+        kept = [dict(q, section=keep[q['section']]) for q in bank.questions if q['section'] in keep]
+        dropped = len(bank.questions) - len(kept)
+
+    refreshed = QuestionBank(video_id, len(sections), kept)
+    refreshed.last_top_up = bank.last_top_up
+    unchanged = set(keep.values())
+    changed = [index for index in range(len(sections)) if index not in unchanged]
+
+    error = None
+    if changed:
+        print(f"Regenerating questions for {len(changed)} of {len(sections)} sections...")
+        wanted = -(-BANK_SIZE * len(changed) // len(sections))
+        error = _fill_sections(refreshed, sections, changed, wanted)
+
+    save_artifact(video_id, 'question_bank', refreshed.to_dict())
+    with _banks_lock:
+        _banks[video_id] = refreshed
+
+    return {
+        "success": True,
+        "kept": len(kept),
+        "dropped": dropped,
+        "added": len(refreshed.questions) - len(kept),
+        "sections_regenerated": changed,
+        "error": error
+    }
+
+
+def top_up_bank(video_id):
+    """
+    Add questions to a bank whose fresh pool is running low
+
+    Sections with the fewest fresh questions are filled first.
+
+    Args:
+        video_id (str): YouTube video ID
+    """
+    try:
+        bank = get_bank(video_id)
+        transcript_result = load_saved_transcript(video_id)
+        if bank is None or transcript_result is None or not bank.is_low():
+            return
+        bank.last_top_up = time.monotonic()
+
+        sections = split_sections(transcript_result['transcript'])
+        fresh_per_section = {index: 0 for index in range(len(sections))}
+        for question in bank.fresh_questions():
+            if question['section'] in fresh_per_section:
+                fresh_per_section[question['section']] += 1
+
+        wanted = BANK_SIZE - len(bank.fresh_questions())
+        emptiest = sorted(fresh_per_section, key=fresh_per_section.get)
+        _fill_sections(bank, sections, emptiest[:max(1, -(-wanted // MAX_QUESTIONS_PER_CALL))], wanted)
+
+        save_artifact(video_id, 'question_bank', bank.to_dict())
+        print(f"✓ Question bank topped up for {video_id}: {bank.stats()}")
+
+    finally:
+        with _banks_lock:
+            _top_ups_running.discard(video_id)
+
+
+def request_top_up(video_id):
+    """
+    Queue a background top-up in the bulk lane if none is running for this video
+
+    Args:
+        video_id (str): YouTube video ID
+    """
+    with _banks_lock:
+        if video_id in _top_ups_running:
+            return
+        _top_ups_running.add(video_id)
+
+    try:
+        get_scheduler().submit("question-bank", lambda: top_up_bank(video_id), lane="bulk")
+    except SchedulerRejected:
+        # Busy right now; the next quiz served from this bank will ask again
+        with _banks_lock:
+            _top_ups_running.discard(video_id)
+
+
+def serve_quiz(video_id, count=10, strategy="balanced"):
+    """
+    Serve a quiz from an existing bank without any AI call
+
+    Args:
+        video_id (str): YouTube video ID
+        count (int): Number of questions
+        strategy (str): "balanced" or "random"
+
+    Returns:
+        dict: Quiz response, or None if the video has no bank yet
+    """
+    bank = get_bank(video_id)
+    if bank is None:
+        return None
+
+    questions = bank.draw(count, strategy)
+    if bank.needs_top_up():
+        request_top_up(video_id)
+
+    return {
+        "success": True,
+        "video_id": video_id,
+        "generated_at": datetime.now().isoformat(),
+        "quiz": format_quiz({"quiz": questions}),
+        "bank": bank.stats()
+    }
+
+
+def is_building(video_id):
+    """True if the bank of a video is being built right now"""
+    with _banks_lock:
+        return video_id in _builds_running
+
+
+def building_response(video_id):
+    """
+    Response for a quiz request that arrives while the video's bank is being built
+
+    Returns:
+        dict: Status with the suggested retry delay in seconds
+    """
+    return {
+        "success": True,
+        "video_id": video_id,
+        "status": "building",
+        "message": "The question bank of this video is being built. Please retry shortly.",
+        "retry_after": BUILD_RETRY_SECONDS
+    }
+
+
+def run_question_bank(youtube_url, count=10, strategy="balanced"):
+    """
+    Build the bank of a video if needed and serve a quiz from it
+
+    Args:
+        youtube_url (str): YouTube video URL or video ID
+        count (int): Number of questions
+        strategy (str): "balanced" or "random"
+
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    video_id = extract_video_id(youtube_url)
+    if not video_id:
+        return format_error_response(
+            "Invalid YouTube URL or video ID",
+            "validation"
+        ), 400
+
+    served = serve_quiz(video_id, count, strategy)
+    if served:
+        return served, 200
+
+    # One build per video; concurrent requests return at once instead of
+    # holding a scheduler worker until the build is done
+    with _banks_lock:
+        if video_id in _builds_running:
+            return building_response(video_id), 202
+        _builds_running.add(video_id)
+
+    try:
+        transcript_result = get_transcript_cached(youtube_url)
+
+        if not transcript_result['success']:
+            return format_error_response(
+                transcript_result.get('error', 'Transcript extraction failed'),
+                "transcript_extraction"
+            ), 400
+
+        result = build_bank(video_id, transcript_result['transcript'])
+    finally:
+        with _banks_lock:
+            _builds_running.discard(video_id)
+
+    if not result['success']:
+        return format_error_response(
+            result.get('error', 'Question bank generation failed'),
+            "quiz_generation"
+        ), 500
+
+    return serve_quiz(video_id, count, strategy), 200
@@ -0,0 +1,337 @@
+"""
+Quiz Attempts
+Grades submitted quiz answers, stores them in batches and keeps live per-question statistics
+"""
+
+import sys
+import os
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.youtube_service import extract_video_id
+from backend.artifact_store import load_artifact
+from backend.question_bank import get_bank
+from backend.catalog import get_catalog
+from backend.formatter import format_error_response, question_id
+
+# Load environment variables
+load_dotenv()
+
+
+FLUSH_SIZE = int(os.getenv('ATTEMPTS_FLUSH_SIZE', '500'))
+FLUSH_SECONDS = float(os.getenv('ATTEMPTS_FLUSH_SECONDS', '2'))
+MAX_ANSWERS = 200          # Answers accepted in one submission
+ANSWER_KEY_TTL = 60        # Seconds an answer key is reused before reloading
+ANSWER_KEY_MIN_AGE = 5     # Unknown question IDs reload a key at most this often
+ANSWER_KEY_CACHE = 256     # Videos whose answer keys are kept in memory
+
+
+def load_answer_key(video_id):
+    """
+    Build the answer key of a video from its stored quiz and question bank
+
+    Args:
+        video_id (str): YouTube video ID
+
+    Returns:
+        tuple: (question id -> {question, options, correct_answer},
+                question ids of the stored quiz in display order)
+    """
+    key = {}
+    order = []
+
+    stored_quiz = load_artifact(video_id, 'quiz') or {}
+    for question in stored_quiz.get('quiz', []):
+        qid = question.get('id') or question_id(question)
+        key[qid] = {
+            "question": question['question'],
+            "options": tuple(question.get('options', {})),
+            "correct_answer": question['correct_answer']
+        }
+        order.append(qid)
+
+    bank = get_bank(video_id)
+    if bank is not None:
+        for question in list(bank.questions):
+            key.setdefault(question['id'], {
+                "question": question['question'],
+                "options": tuple(question.get('options', {})),
+                "correct_answer": question['correct_answer']
+            })
+
+    return key, order
+
+
+class AttemptRecorder:
+    """
+    Ingests graded quiz answers
+
+    Answers are graded against the stored correct_answer and counted in
+    memory per video and question at once, so statistics never scan raw
+    attempts. The raw attempts are buffered and written to the catalog in
+    batches, either when FLUSH_SIZE answers are waiting or every
+    FLUSH_SECONDS. Counters of a video are seeded from the catalog the
+    first time the video is seen.
+    """
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._counters = {}          # video_id -> question_id -> counts
+        self._keys = OrderedDict()   # video_id -> (loaded_at, key, order)
+        self._received = 0
+        self._stored = 0
+
+        get_catalog()   # Created first, so its exit flush runs after ours
+        atexit.register(self.flush)
+        thread = threading.Thread(target=self._flush_loop, name="attempt-writer", daemon=True)
+        thread.start()
+
+
+    def _answer_key(self, video_id, reload=False):
+        """Cached answer key of a video"""
+        with self._lock:
+            cached = self._keys.get(video_id)
+            age = time.monotonic() - cached[0] if cached else None
+            if cached and age < (ANSWER_KEY_MIN_AGE if reload else ANSWER_KEY_TTL):
+                self._keys.move_to_end(video_id)
+                return cached[1], cached[2]
+
+        key, order = load_answer_key(video_id)
+        if not key:
+            return key, order
+        with self._lock:
+            self._keys[video_id] = (time.monotonic(), key, order)
+            self._keys.move_to_end(video_id)
+            while len(self._keys) > ANSWER_KEY_CACHE:
+                self._keys.popitem(last=False)
+        return key, order
+
+
+    def _video_counters(self, video_id):
+        """Per-question counters of a video, seeded from the catalog on first use"""
+        with self._lock:
+            counters = self._counters.get(video_id)
+        if counters is not None:
+            return counters
+
+        seeded = {}
+        for row in get_catalog().attempt_counts(video_id):
+            counts = seeded.setdefault(row['question_id'], {"attempts": 0, "correct": 0, "answers": {}})
+            counts["attempts"] += row['count']
+            counts["correct"] += row['count'] if row['correct'] else 0
+            counts["answers"][row['answer']] = counts["answers"].get(row['answer'], 0) + row['count']
+
+        with self._lock:
+            # Another request may have seeded the video meanwhile; the first one wins
+            return self._counters.setdefault(video_id, seeded)
+
+
+    def record(self, video_id, answers, student_id=None):
+        """
+        Grade and record one quiz submission
+
+        Args:
+            video_id (str): YouTube video ID
+            answers (list): Dicts with "answer" and either "question_id" or
+                "question_index" (position in the stored quiz)
+            student_id (str): Optional student identifier
+
+        Returns:
+            dict: Graded results and rejected answers, or None if the video has no quiz
+        """
+        key, order = self._answer_key(video_id)
+        if not key:
+            return None
+
+        results, rejected = [], []
+        reloaded = False
+        for position, item in enumerate(answers):
+            qid = item.get('question_id')
+            if qid is None and isinstance(item.get('question_index'), int) \
+                    and 0 <= item['question_index'] < len(order):
+                qid = order[item['question_index']]
+
+            if qid is not None and qid not in key and not reloaded:
+                # Questions added by a bank top-up or quiz regeneration since the last load
+                key, order = self._answer_key(video_id, reload=True)
+                reloaded = True
+
+            expected = key.get(qid)
+            answer = str(item.get('answer', '')).strip().upper()
+            if expected is None:
+                rejected.append({"index": position, "reason": "unknown question"})
+            elif answer not in expected['options']:
+                rejected.append({"index": position, "question_id": qid, "reason": "invalid answer"})
+            else:
+                results.append({
+                    "question_id": qid,
+                    "answer": answer,
+                    "correct": answer == expected['correct_answer'],
+                    "correct_answer": expected['correct_answer']
+                })
+
+        counters = self._video_counters(video_id)
+        submitted_at = datetime.now().isoformat()
+        rows = [
+            (video_id, result['question_id'], student_id, result['answer'],
+             int(result['correct']), submitted_at)
+            for result in results
+        ]
+
+        with self._lock:
+            for result in results:
+                counts = counters.setdefault(result['question_id'], {"attempts": 0, "correct": 0, "answers": {}})
+                counts["attempts"] += 1
+                counts["correct"] += int(result['correct'])
+                counts["answers"][result['answer']] = counts["answers"].get(result['answer'], 0) + 1
+            self._received += len(rows)
+            self._buffer.extend(rows)
+            batch = self._take_batch() if len(self._buffer) >= self.flush_size else None
+
+        if batch:
+            self._write(batch)
+
+        return {
+            "success": True,
+            "video_id": video_id,
+            "graded": len(results),
+            "score": sum(1 for result in results if result['correct']),
+            "results": results,
+            "rejected": rejected
+        }
+
+
+    def stats(self, video_id=None):
+        """
+        Live answer statistics
+
+        Args:
+            video_id (str): Video to report per question; None for ingestion totals only
+
+        Returns:
+            dict: Counters, hardest questions first
+        """
+        if video_id is None:
+            with self._lock:
+                return {
+                    "received": self._received,
+                    "stored": self._stored,
+                    "buffered": len(self._buffer),
+                    "videos": len(self._counters)
+                }
+
+        counters = self._video_counters(video_id)
+        key, _ = self._answer_key(video_id)
+        with self._lock:
+            questions = [
+                {
+                    "question_id": qid,
+                    "question": key.get(qid, {}).get('question'),
+                    "correct_answer": key.get(qid, {}).get('correct_answer'),
+                    "attempts": counts["attempts"],
+                    "correct": counts["correct"],
+                    "correct_rate": round(counts["correct"] / counts["attempts"], 3),
+                    "answers": dict(counts["answers"])
+                }
+                for qid, counts in counters.items() if counts["attempts"]
+            ]
+
+        questions.sort(key=lambda question: (question['correct_rate'], -question['attempts']))
+        attempts = sum(question['attempts'] for question in questions)
+        correct = sum(question['correct'] for question in questions)
+        return {
+            "success": True,
+            "video_id": video_id,
+            "attempts": attempts,
+            "correct_rate": round(correct / attempts, 3) if attempts else None,
+            "questions": questions
+        }
+
+
+    def flush(self):
+        """Write all buffered attempts and wait until they are committed"""
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self._write(batch)
+        get_catalog().flush()
+
+
+    def _take_batch(self):
+        """Swap out the buffer (caller holds the lock)"""
+        batch, self._buffer = self._buffer, []
+        return batch
+
+
+    def _write(self, batch):
+        """Queue one batch for the catalog writer"""
+        get_catalog().record_attempts(batch)
+        with self._lock:
+            self._stored += len(batch)
+
+
+    def _flush_loop(self):
+        """Write buffered attempts every flush_seconds"""
+        while True:
+            time.sleep(self.flush_seconds)
+            with self._lock:
+                batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+
+# Global recorder instance
+attempt_recorder = None
+_recorder_lock = threading.Lock()
+
+def get_attempt_recorder():
+    """Get or create attempt recorder instance (starts its flush thread)"""
+    global attempt_recorder
+    if attempt_recorder is None:
+        with _recorder_lock:
+            if attempt_recorder is None:
+                attempt_recorder = AttemptRecorder()
+    return attempt_recorder
+
+
+def run_record_attempts(data):
+    """
+    Validate and record a quiz submission
+
+    Args:
+        data (dict): Request body with youtube_url or video_id, answers and optional student_id
+
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    video_id = extract_video_id(str(data.get('video_id') or data.get('youtube_url') or ''))
+    if not video_id:
+        return format_error_response("Provide a valid youtube_url or video_id", "validation"), 400
+
+    answers = data.get('answers')
+    if not isinstance(answers, list) or not answers or not all(isinstance(item, dict) for item in answers):
+        return format_error_response("answers must be a non-empty list of objects", "validation"), 400
+    for position, item in enumerate(answers):
+        if item.get('question_id') is not None and not isinstance(item['question_id'], str):
+            return format_error_response(f"answers[{position}].question_id must be a string", "validation"), 400
+        index = item.get('question_index')
+        if index is not None and (not isinstance(index, int) or isinstance(index, bool)):
+            return format_error_response(f"answers[{position}].question_index must be an integer", "validation"), 400
+    if len(answers) > MAX_ANSWERS:
+        return format_error_response(f"At most {MAX_ANSWERS} answers per submission", "validation"), 400
+
+    student_id = data.get('student_id')
+    result = get_attempt_recorder().record(video_id, answers, str(student_id) if student_id else None)
+    if result is None:
+        return format_error_response("No quiz found for this video. Process it first.", "validation"), 404
+    return result, 200
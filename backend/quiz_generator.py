@@ -11,7 +11,11 @@ import re
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from backend.ai_engine import get_ai_engine
-from models.prompts import QUIZ_PROMPT
+from backend.transcript import transcript_text
+from models.prompts import QUIZ_PROMPT, QUIZ_BANK_PROMPT
+
+
+TRANSCRIPT_CHARS = 9000   # Transcript characters sent to the model
 
 
 def parse_quiz_response(quiz_text):
@@ -74,7 +78,7 @@ def generate_quiz(transcript):
     Generate exactly 10 MCQ questions from transcript using AI
     
     Args:
-        transcript (str): Video transcript text
+        transcript (Transcript or str): Video transcript
         
     Returns:
         dict: Dictionary containing success status and quiz questions
@@ -84,13 +88,15 @@ def generate_quiz(transcript):
         ai_engine = get_ai_engine()
         
         # Prepare prompt
-        prompt = QUIZ_PROMPT.format(transcript=transcript[:9000])  # Limit to 9000 chars
+        transcript = transcript_text(transcript)
+        prompt = QUIZ_PROMPT.format(transcript=transcript[:TRANSCRIPT_CHARS])
         
         # Generate quiz
         result = ai_engine.generate_response(
             prompt=prompt,
             max_tokens=2000,
-            temperature=0.6
+            temperature=0.6,
+            stage="quiz"
         )
         
         if result['success']:
@@ -109,7 +115,10 @@ def generate_quiz(transcript):
             return {
                 "success": True,
                 "quiz": questions,
-                "total_questions": len(questions)
+                "total_questions": len(questions),
+                "tokens_used": result.get('tokens_used'),
+                "model": result.get('model'),
+                "truncated": result.get('truncated', False)
             }
         else:
             return {
@@ -124,6 +133,52 @@ def generate_quiz(transcript):
         }
 
 
+def generate_question_pool(transcript_section, count):
+    """
+    Generate a batch of MCQ questions from one transcript section for the question bank
+    
+    Args:
+        transcript_section (str): Part of the video transcript
+        count (int): Number of questions to ask for
+        
+    Returns:
+        dict: Dictionary containing success status and parsed questions
+    """
+    try:
+        # Get AI engine
+        ai_engine = get_ai_engine()
+        
+        # Prepare prompt
+        prompt = QUIZ_BANK_PROMPT.format(transcript=transcript_section, count=count)
+        
+        # Roughly 150 tokens per question in the expected format
+        result = ai_engine.generate_response(
+            prompt=prompt,
+            max_tokens=min(4000, 150 * count + 100),
+            temperature=0.7,
+            stage="question_bank"
+        )
+        
+        if result['success']:
+            return {
+                "success": True,
+                "quiz": parse_quiz_response(result['text']),
+                "tokens_used": result.get('tokens_used'),
+                "model": result.get('model')
+            }
+        else:
+            return {
+                "success": False,
+                "error": result.get('error', 'Failed to generate question pool')
+            }
+            
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Question pool generation failed: {str(e)}"
+        }
+
+
 if __name__ == "__main__":
     # Test
     test_transcript = "This is a test transcript about machine learning and AI."
@@ -0,0 +1,205 @@
+"""
+Incremental Reprocessing
+Detects caption changes of a video and regenerates only the parts of its package they affect
+"""
+
+import sys
+import os
+import difflib
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.youtube_service import extract_video_id, get_transcript, load_saved_transcript
+from backend import summarizer, keypoints, quiz_generator
+from backend.artifact_store import delete_artifact, load_artifact
+from backend.question_bank import section_spans, refresh_bank
+from backend.vector_index import drop_index
+from backend.catalog import get_catalog
+from backend.pipeline import run_pipeline
+from backend.formatter import format_error_response
+
+
+# Artifact -> transcript characters its prompt is built from
+ARTIFACT_INPUT_CHARS = {
+    "summary": summarizer.TRANSCRIPT_CHARS,
+    "keypoints": keypoints.TRANSCRIPT_CHARS,
+    "quiz": quiz_generator.TRANSCRIPT_CHARS
+}
+
+
+def diff_transcripts(old, new):
+    """
+    Compare two transcripts segment by segment
+
+    Args:
+        old (Transcript): Stored transcript
+        new (Transcript): Newly fetched transcript
+
+    Returns:
+        dict: Segment opcodes, changed character ranges in both texts and
+            the number of changed segments
+    """
+    old_texts = [old.segment_text(index) for index in range(len(old))]
+    new_texts = [new.segment_text(index) for index in range(len(new))]
+    matcher = difflib.SequenceMatcher(None, old_texts, new_texts, autojunk=False)
+    opcodes = matcher.get_opcodes()
+
+    old_ranges, new_ranges = [], []
+    changed_segments = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        old_ranges.append((old.offset(i1), old.offset(i2)))
+        new_ranges.append((new.offset(j1), new.offset(j2)))
+        changed_segments += max(i2 - i1, j2 - j1)
+
+    return {
+        "opcodes": opcodes,
+        "old_ranges": old_ranges,
+        "new_ranges": new_ranges,
+        "changed_segments": changed_segments
+    }
+
+
+def _overlaps(span, ranges):
+    """True if a (start, end) span touches any changed range (insertions have zero width)"""
+    start, end = span
+    return any(low < end and (high > start or low >= start) for low, high in ranges)
+
+
+def map_sections(old, new, changes):
+    """
+    Match unchanged question bank sections of the old transcript to the new one
+
+    A section is unchanged if no changed range falls inside it. Its text
+    may still have moved, so it is matched to the new section that holds
+    its middle character.
+
+    Args:
+        old (Transcript): Stored transcript
+        new (Transcript): Newly fetched transcript
+        changes (dict): Result of diff_transcripts()
+
+    Returns:
+        dict: Old section index -> new section index
+    """
+    new_spans = section_spans(new)
+    keep = {}
+    for old_index, span in enumerate(section_spans(old)):
+        if _overlaps(span, changes['old_ranges']):
+            continue
+
+        middle = (span[0] + span[1]) // 2
+        for tag, i1, i2, j1, j2 in changes['opcodes']:
+            if tag == 'equal' and old.offset(i1) <= middle < old.offset(i2):
+                position = middle - old.offset(i1) + new.offset(j1)
+                break
+        else:
+            continue
+
+        for new_index, (start, end) in enumerate(new_spans):
+            if start <= position < end and not _overlaps((start, end), changes['new_ranges']):
+                keep[old_index] = new_index
+                break
+    return keep
+
+
+def invalidate(video_id, old, new, changes):
+    """
+    Delete or update the stored parts of a package that a caption change affects
+
+    Summary, key points and quiz are only invalidated when the part of the
+    transcript their prompt reads has changed. The question bank keeps the
+    questions of unchanged sections. The Q&A index is cheap and is rebuilt
+    on the next question.
+
+    Args:
+        video_id (str): YouTube video ID
+        old (Transcript): Stored transcript
+        new (Transcript): Newly fetched transcript
+        changes (dict): Result of diff_transcripts()
+
+    Returns:
+        tuple: (invalidated artifacts as dicts with artifact and reason, names of kept artifacts)
+    """
+    invalidated, kept = [], []
+
+    for name, chars in ARTIFACT_INPUT_CHARS.items():
+        if old.text[:chars] != new.text[:chars]:
+            delete_artifact(video_id, name)
+            invalidated.append({"artifact": name, "reason": f"transcript changed within its first {chars} characters"})
+        else:
+            kept.append(name)
+
+    if load_artifact(video_id, 'question_bank'):
+        keep = map_sections(old, new, changes)
+        bank_result = refresh_bank(video_id, new, keep)
+        if bank_result and bank_result['sections_regenerated']:
+            invalidated.append({
+                "artifact": "question_bank",
+                "reason": f"sections {bank_result['sections_regenerated']} changed: "
+                          f"{bank_result['dropped']} questions dropped, {bank_result['added']} added"
+            })
+        else:
+            kept.append("question_bank")
+
+    drop_index(video_id)
+    invalidated.append({"artifact": "index", "reason": f"{changes['changed_segments']} segments changed"})
+
+    return invalidated, kept
+
+
+def run_refresh(youtube_url):
+    """
+    Fetch a video's captions again and update its package incrementally
+
+    Without a stored transcript this is the same as /api/process.
+
+    Args:
+        youtube_url (str): YouTube video URL or video ID
+
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    video_id = extract_video_id(youtube_url)
+    if not video_id:
+        return format_error_response("Invalid YouTube URL", "validation"), 400
+
+    stored = load_saved_transcript(video_id)
+    if stored is None:
+        return run_pipeline(youtube_url)
+
+    print(f"Checking captions of video {video_id} for changes...")
+    fetched = get_transcript(youtube_url)
+    if not fetched['success']:
+        return format_error_response(
+            fetched.get('error', 'Transcript extraction failed'),
+            "transcript_extraction"
+        ), 400
+
+    old, new = stored['transcript'], fetched['transcript']
+    changes = diff_transcripts(old, new)
+
+    if changes['changed_segments']:
+        invalidated, kept = invalidate(video_id, old, new, changes)
+        print(f"✓ {changes['changed_segments']} segments changed; invalidated: "
+              f"{', '.join(item['artifact'] for item in invalidated)}")
+        try:
+            get_catalog().record_invalidations(video_id, invalidated, changes['changed_segments'])
+        except Exception as e:
+            print(f"⚠ Warning: Could not record invalidations in catalog: {str(e)}")
+    else:
+        print(f"✓ Captions unchanged for video {video_id}")
+        invalidated, kept = [], list(ARTIFACT_INPUT_CHARS)
+
+    # Regenerates exactly the artifacts deleted above and reuses the rest; the
+    # package is rewritten even when only text past the prompt prefixes changed
+    response, status = run_pipeline(video_id, rewrite_package=changes['changed_segments'] > 0)
+    if status == 200:
+        response["refresh"] = {
+            "changed_segments": changes['changed_segments'],
+            "invalidated": invalidated,
+            "kept": kept
+        }
+    return response, status
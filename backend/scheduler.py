@@ -0,0 +1,379 @@
+"""
+Request Scheduler
+Admission control and weighted fair queuing for the processing pipeline
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+# Priority lanes, highest priority first
+LANES = ("interactive", "bulk")
+
+
+# Lane of the job running on the current worker thread
+_job_context = threading.local()
+
+
+def current_lane():
+    """Priority lane of the job running in this thread (interactive outside the scheduler)"""
+    return getattr(_job_context, 'lane', 'interactive')
+
+
+class SchedulerRejected(Exception):
+    """
+    Raised when a job cannot be admitted (global queue full or client quota used up)
+    """
+
+    def __init__(self, message, retry_after, reason):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class Ticket:
+    """
+    Handle for a submitted job, used by the caller to wait for the result
+    """
+
+    __slots__ = ("client_id", "lane", "func", "start_tag", "finish_tag",
+                 "enqueued_at", "started_at", "finished_at",
+                 "result", "error", "_done")
+
+    def __init__(self, client_id, lane, func):
+        self.client_id = client_id
+        self.lane = lane
+        self.func = func
+        self.start_tag = 0.0
+        self.finish_tag = 0.0
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """
+        Block until the job has run
+
+        Args:
+            timeout (float): Seconds to wait, None waits forever
+
+        Returns:
+            Any: Return value of the job function
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Job did not finish in time")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    @property
+    def wait_time(self):
+        """Seconds the job spent queued before a worker picked it up"""
+        if self.started_at is None:
+            return time.monotonic() - self.enqueued_at
+        return self.started_at - self.enqueued_at
+
+
+class RequestScheduler:
+    """
+    Bounded, multi-lane job scheduler with per-client fairness
+
+    Jobs wait in one of two priority lanes. Interactive jobs are served
+    before bulk jobs, but bulk gets at least one slot every
+    `bulk_every` dispatches so it never starves. Within a lane, clients
+    are served by weighted fair queuing on virtual finish tags, so one
+    client's large import cannot push everyone else to the back.
+
+    The lane is decided here, not by the caller alone: a client that
+    already has `interactive_per_client` interactive jobs in progress
+    gets its further jobs placed in the bulk lane.
+    """
+
+    def __init__(self, workers=4, max_queue=64, client_quota=8,
+                 client_weights=None, bulk_every=4, interactive_per_client=2,
+                 history_size=500):
+        """
+        Initialize the scheduler and start its worker threads
+
+        Args:
+            workers (int): Number of jobs that may run at the same time
+            max_queue (int): Maximum number of queued (not running) jobs
+            client_quota (int): Maximum queued + running jobs per client
+            client_weights (dict): Optional client_id -> weight (default 1.0)
+            bulk_every (int): Dispatch a waiting bulk job at least every N dispatches
+            interactive_per_client (int): Interactive jobs a client may have in
+                progress before further jobs go to the bulk lane
+            history_size (int): Number of recent jobs kept for wait-time stats
+        """
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.client_quota = max(1, client_quota)
+        self.client_weights = dict(client_weights or {})
+        self.bulk_every = max(1, bulk_every)
+        self.interactive_per_client = max(1, interactive_per_client)
+
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._queues = {lane: [] for lane in LANES}
+        self._virtual_time = {lane: 0.0 for lane in LANES}
+        self._last_finish = {lane: {} for lane in LANES}
+        self._outstanding = {}
+        self._interactive = {}
+        self._running = 0
+        self._since_bulk = 0
+        self._seq = itertools.count()
+
+        self._wait_history = {lane: deque(maxlen=history_size) for lane in LANES}
+        self._service_history = deque(maxlen=history_size)
+        self._counters = {"admitted": 0, "completed": 0, "failed": 0,
+                          "rejected_queue_full": 0, "rejected_quota": 0,
+                          "demoted_to_bulk": 0}
+
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"scheduler-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+
+    def submit(self, client_id, func, lane="interactive"):
+        """
+        Queue a job for execution
+
+        Args:
+            client_id (str): Identifier of the requesting client
+            func (callable): Zero-argument function to run
+            lane (str): "interactive" or "bulk"; interactive may be demoted to bulk
+
+        Returns:
+            Ticket: Handle to wait on (ticket.lane is the lane actually used)
+
+        Raises:
+            SchedulerRejected: If the queue is full or the client is over quota
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane}")
+
+        ticket = Ticket(client_id, lane, func)
+
+        with self._lock:
+            queued = sum(len(q) for q in self._queues.values())
+
+            if self._outstanding.get(client_id, 0) >= self.client_quota:
+                self._counters["rejected_quota"] += 1
+                raise SchedulerRejected(
+                    f"Too many requests in progress for this client (limit {self.client_quota}). Please retry later.",
+                    self._retry_after(queued),
+                    "client_quota"
+                )
+
+            if queued >= self.max_queue:
+                self._counters["rejected_queue_full"] += 1
+                raise SchedulerRejected(
+                    "Server is busy processing other videos. Please retry later.",
+                    self._retry_after(queued),
+                    "queue_full"
+                )
+
+            if lane == "interactive" and \
+                    self._interactive.get(client_id, 0) >= self.interactive_per_client:
+                lane = ticket.lane = "bulk"
+                self._counters["demoted_to_bulk"] += 1
+            if lane == "interactive":
+                self._interactive[client_id] = self._interactive.get(client_id, 0) + 1
+
+            # Weighted fair queuing: finish tag grows by 1/weight per job
+            weight = self.client_weights.get(client_id, 1.0)
+            ticket.start_tag = max(self._virtual_time[lane],
+                                   self._last_finish[lane].get(client_id, 0.0))
+            ticket.finish_tag = ticket.start_tag + 1.0 / weight
+            self._last_finish[lane][client_id] = ticket.finish_tag
+
+            heapq.heappush(self._queues[lane], (ticket.finish_tag, next(self._seq), ticket))
+            self._outstanding[client_id] = self._outstanding.get(client_id, 0) + 1
+            self._counters["admitted"] += 1
+            self._has_work.notify()
+
+        return ticket
+
+
+    def stats(self):
+        """
+        Get queue depth, wait-time and throughput statistics
+
+        Returns:
+            dict: Scheduler statistics
+        """
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                waits = sorted(self._wait_history[lane])
+                lanes[lane] = {
+                    "queued": len(self._queues[lane]),
+                    "wait_seconds": {
+                        "samples": len(waits),
+                        "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                        "p50": round(_percentile(waits, 50), 3),
+                        "p95": round(_percentile(waits, 95), 3),
+                        "max": round(waits[-1], 3) if waits else 0.0
+                    }
+                }
+
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": sum(len(q) for q in self._queues.values()),
+                "max_queue": self.max_queue,
+                "client_quota": self.client_quota,
+                "lanes": lanes,
+                "clients": dict(self._outstanding),
+                "avg_service_seconds": round(self._avg_service_time(), 3),
+                "counters": dict(self._counters)
+            }
+
+
+    def _retry_after(self, queued):
+        """Estimate seconds until a slot frees up (caller holds the lock)"""
+        estimate = (queued + 1) * self._avg_service_time() / self.workers
+        return max(1, math.ceil(estimate))
+
+
+    def _avg_service_time(self):
+        """Average job run time over recent history (caller holds the lock)"""
+        if not self._service_history:
+            return 1.0
+        return sum(self._service_history) / len(self._service_history)
+
+
+    def _next_ticket(self):
+        """Pop the next job by lane priority and fair order (caller holds the lock)"""
+        interactive, bulk = self._queues["interactive"], self._queues["bulk"]
+
+        if bulk and (not interactive or self._since_bulk >= self.bulk_every - 1):
+            lane = "bulk"
+            self._since_bulk = 0
+        elif interactive:
+            lane = "interactive"
+            if bulk:
+                self._since_bulk += 1
+        else:
+            return None
+
+        _, _, ticket = heapq.heappop(self._queues[lane])
+        self._virtual_time[lane] = ticket.start_tag
+        return ticket
+
+
+    def _worker(self):
+        """Worker loop: take the next job and run it"""
+        while True:
+            with self._has_work:
+                ticket = self._next_ticket()
+                while ticket is None:
+                    self._has_work.wait()
+                    ticket = self._next_ticket()
+                self._running += 1
+
+            ticket.started_at = time.monotonic()
+            _job_context.lane = ticket.lane
+            try:
+                ticket.result = ticket.func()
+            except Exception as e:
+                ticket.error = e
+            finally:
+                _job_context.lane = 'interactive'
+            ticket.finished_at = time.monotonic()
+
+            with self._lock:
+                self._running -= 1
+                self._wait_history[ticket.lane].append(ticket.wait_time)
+                self._service_history.append(ticket.finished_at - ticket.started_at)
+                self._counters["failed" if ticket.error else "completed"] += 1
+
+                if ticket.lane == "interactive":
+                    interactive = self._interactive.get(ticket.client_id, 1) - 1
+                    if interactive > 0:
+                        self._interactive[ticket.client_id] = interactive
+                    else:
+                        self._interactive.pop(ticket.client_id, None)
+
+                remaining = self._outstanding.get(ticket.client_id, 1) - 1
+                if remaining > 0:
+                    self._outstanding[ticket.client_id] = remaining
+                else:
+                    # Client is idle: forget its fairness state
+                    self._outstanding.pop(ticket.client_id, None)
+                    for lane in LANES:
+                        self._last_finish[lane].pop(ticket.client_id, None)
+
+            ticket._done.set()
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _parse_weights(raw):
+    """Parse 'client:weight,client:weight' into a dict"""
+    weights = {}
+    for item in (raw or "").split(","):
+        if ":" not in item:
+            continue
+        client_id, weight = item.rsplit(":", 1)
+        try:
+            weights[client_id.strip()] = max(0.01, float(weight))
+        except ValueError:
+            continue
+    return weights
+
+
+# Global scheduler instance
+scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Get or create scheduler instance configured from environment"""
+    global scheduler
+    if scheduler is None:
+        with _scheduler_lock:
+            if scheduler is None:
+                scheduler = RequestScheduler(
+                    workers=int(os.getenv('SCHEDULER_WORKERS', '4')),
+                    max_queue=int(os.getenv('SCHEDULER_MAX_QUEUE', '64')),
+                    client_quota=int(os.getenv('SCHEDULER_CLIENT_QUOTA', '8')),
+                    client_weights=_parse_weights(os.getenv('SCHEDULER_CLIENT_WEIGHTS')),
+                    bulk_every=int(os.getenv('SCHEDULER_BULK_EVERY', '4')),
+                    interactive_per_client=int(os.getenv('SCHEDULER_INTERACTIVE_PER_CLIENT', '2'))
+                )
+    return scheduler
+
+
+if __name__ == "__main__":
+    # Test: one noisy bulk client and one interactive client
+    test_scheduler = RequestScheduler(workers=2, max_queue=10, client_quota=6)
+    tickets = []
+    for i in range(6):
+        tickets.append(test_scheduler.submit("importer", lambda i=i: time.sleep(0.1) or f"bulk-{i}", lane="bulk"))
+    tickets.append(test_scheduler.submit("student", lambda: "interactive-0"))
+    try:
+        test_scheduler.submit("importer", lambda: None, lane="bulk")
+    except SchedulerRejected as e:
+        print(f"Rejected ({e.reason}), retry after {e.retry_after}s")
+    print([ticket.wait() for ticket in tickets])
+    print(test_scheduler.stats())
@@ -10,15 +10,19 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from backend.ai_engine import get_ai_engine
+from backend.transcript import transcript_text
 from models.prompts import SUMMARY_PROMPT
 
 
+TRANSCRIPT_CHARS = 8000   # Transcript characters sent to the model
+
+
 def generate_summary(transcript):
     """
     Generate summary from transcript using AI
     
     Args:
-        transcript (str): Video transcript text
+        transcript (Transcript or str): Video transcript
         
     Returns:
         dict: Dictionary containing success status and summary
@@ -28,19 +32,24 @@ def generate_summary(transcript):
         ai_engine = get_ai_engine()
         
         # Prepare prompt
-        prompt = SUMMARY_PROMPT.format(transcript=transcript[:8000])  # Limit to 8000 chars
+        transcript = transcript_text(transcript)
+        prompt = SUMMARY_PROMPT.format(transcript=transcript[:TRANSCRIPT_CHARS])
         
         # Generate summary
         result = ai_engine.generate_response(
             prompt=prompt,
             max_tokens=800,
-            temperature=0.5
+            temperature=0.5,
+            stage="summary"
         )
         
         if result['success']:
             return {
                 "success": True,
-                "summary": result['text']
+                "summary": result['text'],
+                "tokens_used": result.get('tokens_used'),
+                "model": result.get('model'),
+                "truncated": result.get('truncated', False)
             }
         else:
             return {
@@ -0,0 +1,160 @@
+"""
+Transcript Object
+Compact in-memory transcript: segment timings in typed arrays, text in one buffer
+"""
+
+import re
+from array import array
+
+
+WORD_PATTERN = re.compile(r'\S+')
+
+
+class Transcript:
+    """
+    Transcript of one video
+
+    Segment starts and durations are stored in typed arrays and all segment
+    texts in one string, joined by single spaces, so the full text needs no
+    extra copy. Derived values (word count, per-segment dicts) are computed
+    on first use only. Iterating yields segment dicts in the same format as
+    YouTubeTranscriptApi, so code written for the segment list keeps working.
+    """
+
+    __slots__ = ("video_id", "language", "_starts", "_durations", "_offsets", "_text", "_word_count")
+
+    def __init__(self, video_id=None, language="unknown"):
+        self.video_id = video_id
+        self.language = language
+        self._starts = array('d')
+        self._durations = array('d')
+        self._offsets = array('I', [0])   # Start of each segment in _text, plus end sentinel
+        self._text = ""
+        self._word_count = None
+
+
+    @classmethod
+    def from_segments(cls, segments, video_id=None, language="unknown"):
+        """
+        Build a transcript in one pass over a segment iterable (list or generator)
+
+        Args:
+            segments (iterable): Dicts with 'text', 'start' and 'duration'
+            video_id (str): YouTube video ID
+            language (str): Language code
+
+        Returns:
+            Transcript: The transcript
+        """
+        transcript = cls(video_id, language)
+        texts = []
+        position = 0
+
+        for segment in segments:
+            text = segment['text']
+            transcript._starts.append(float(segment.get('start', 0.0)))
+            transcript._durations.append(float(segment.get('duration', 0.0)))
+            texts.append(text)
+            position += len(text) + 1
+            transcript._offsets.append(position)
+
+        transcript._text = " ".join(texts)
+        return transcript
+
+
+    @property
+    def text(self):
+        """Full transcript text (segments joined by spaces)"""
+        return self._text
+
+
+    @property
+    def word_count(self):
+        """Number of words, counted once"""
+        if self._word_count is None:
+            self._word_count = sum(1 for _ in WORD_PATTERN.finditer(self._text))
+        return self._word_count
+
+
+    def __len__(self):
+        """Number of segments"""
+        return len(self._starts)
+
+
+    def __str__(self):
+        return self._text
+
+
+    def segment_text(self, index):
+        """Text of one segment"""
+        return self._text[self._offsets[index]:self._offsets[index + 1] - 1]
+
+
+    def offset(self, index):
+        """Position of a segment in the text (index == len(self) gives the end of the text)"""
+        return min(self._offsets[index], len(self._text))
+
+
+    def segment(self, index):
+        """One segment as a dict with 'text', 'start' and 'duration'"""
+        return {
+            "text": self.segment_text(index),
+            "start": self._starts[index],
+            "duration": self._durations[index]
+        }
+
+
+    def __iter__(self):
+        for index in range(len(self._starts)):
+            yield self.segment(index)
+
+
+    def slice_text(self, first, last):
+        """
+        Text of segments first..last-1 as one string
+
+        Args:
+            first (int): First segment index
+            last (int): Segment index after the last one included
+
+        Returns:
+            str: Joined text of the segments
+        """
+        if first >= last:
+            return ""
+        return self._text[self._offsets[first]:self._offsets[last] - 1]
+
+
+    def time_slice(self, start_seconds, end_seconds):
+        """
+        Text spoken between two points in time
+
+        Args:
+            start_seconds (float): Start of the window
+            end_seconds (float): End of the window
+
+        Returns:
+            str: Joined text of the segments overlapping the window
+        """
+        first = 0
+        while first < len(self) and self._starts[first] + self._durations[first] <= start_seconds:
+            first += 1
+        last = first
+        while last < len(self) and self._starts[last] < end_seconds:
+            last += 1
+        return self.slice_text(first, last)
+
+
+def transcript_text(transcript):
+    """
+    Get plain text from a Transcript or a string
+
+    Args:
+        transcript (Transcript or str): Transcript
+
+    Returns:
+        str: Transcript text
+    """
+    if isinstance(transcript, Transcript):
+        return transcript.text
+    return transcript
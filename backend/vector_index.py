@@ -0,0 +1,306 @@
+"""
+Transcript Vector Index
+Chunks transcripts by segment and retrieves relevant chunks with hashed TF-IDF vectors
+"""
+
+import os
+import re
+import json
+import zlib
+import threading
+import tempfile
+from collections import Counter, OrderedDict
+import numpy as np
+
+
+# Folder for per-video indexes: data/indexes/<video_id>.npz + .json
+INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'indexes')
+
+INDEX_VERSION = 2         # Bumped when tokenization changes; older indexes are rebuilt
+N_FEATURES = 2 ** 18      # Hashing space; collisions are rare at transcript scale
+CHUNK_WORDS = 120         # Target words per chunk, keeps the prompt size fixed
+MAX_CHUNK_CHARS = 1000    # Character cap per chunk (CJK captions have no spaces to count)
+MAX_LOADED_INDEXES = 64   # Indexes kept in memory
+
+# Letters and digits of any script, plus combining marks (Indic vowel signs, accents)
+WORD_CHAR = r"(?:[^\W_]|[\u0300-\u036f\u0900-\u0963\u0966-\u0dff])"
+TOKEN_PATTERN = re.compile(rf"{WORD_CHAR}+(?:'{WORD_CHAR}+)?")
+# Han, kana and Hangul, which are indexed as character bigrams
+CJK_PATTERN = re.compile(r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+)")
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have i in is it its of on or so that the
+this to was we were will with you your they them there their what which who how
+do does did not can just like very also then than into about
+""".split())
+
+
+def chunk_segments(segments, chunk_words=CHUNK_WORDS, max_chars=MAX_CHUNK_CHARS):
+    """
+    Group consecutive transcript segments into chunks of about chunk_words words
+
+    A chunk is also closed before it would exceed max_chars characters; a
+    single longer segment is split into pieces of max_chars.
+
+    Args:
+        segments (iterable): Segments with 'text', 'start' and 'duration' (or a Transcript)
+        chunk_words (int): Target words per chunk
+        max_chars (int): Maximum characters per chunk
+
+    Returns:
+        list: Chunks with 'text', 'start' and 'end' (seconds)
+    """
+    chunks = []
+    texts, words, chars, start, end = [], 0, 0, None, 0.0
+
+    for segment in segments:
+        segment_start = segment.get('start', 0.0)
+        segment_end = segment_start + segment.get('duration', 0.0)
+        pieces = [segment['text'][i:i + max_chars] for i in range(0, len(segment['text']), max_chars)]
+
+        for text in pieces:
+            if texts and chars + 1 + len(text) > max_chars:
+                chunks.append({"text": " ".join(texts), "start": start, "end": end})
+                texts, words, chars, start = [], 0, 0, None
+
+            if start is None:
+                start = segment_start
+            texts.append(text)
+            words += len(text.split())
+            chars += len(text) + (1 if len(texts) > 1 else 0)
+            end = segment_end
+
+            if words >= chunk_words:
+                chunks.append({"text": " ".join(texts), "start": start, "end": end})
+                texts, words, chars, start = [], 0, 0, None
+
+    if texts:
+        chunks.append({"text": " ".join(texts), "start": start, "end": end})
+
+    return chunks
+
+
+def tokenize(text):
+    """Content words of a text in any script; runs of CJK characters become overlapping character bigrams"""
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        for i, part in enumerate(CJK_PATTERN.split(word)):
+            if i % 2 == 0:
+                if part:
+                    tokens.append(part)
+            elif len(part) == 1:
+                tokens.append(part)
+            else:
+                tokens.extend(part[j:j + 2] for j in range(len(part) - 1))
+    return tokens
+
+
+def _features(text):
+    """Hashed unigram and bigram counts of a text"""
+    tokens = tokenize(text)
+    terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return Counter(zlib.crc32(term.encode('utf-8')) % N_FEATURES for term in terms)
+
+
+def _lookup(keys, values, queries):
+    """Values for each query in sorted `keys` (0 where a query is not present)"""
+    if not len(keys):
+        return np.zeros(len(queries), dtype=np.float32)
+    positions = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+    return np.where(keys[positions] == queries, values[positions], 0).astype(np.float32)
+
+
+class VectorIndex:
+    """
+    Sparse TF-IDF index over the chunks of one video
+
+    Chunk vectors are stored in CSR form (indptr, indices, data) and IDF
+    weights only for features that occur, so the index stays small on
+    disk and in memory no matter the hashing space.
+    """
+
+    def __init__(self, chunks, indptr, indices, data, idf_features, idf_values):
+        self.chunks = chunks
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.idf_features = idf_features
+        self.idf_values = idf_values
+
+
+    def idf(self, features):
+        """IDF weights of hashed features (0 for features not in the video)"""
+        return _lookup(self.idf_features, self.idf_values, features)
+
+
+    @classmethod
+    def build(cls, chunks):
+        """
+        Vectorize chunks into a new index
+
+        Args:
+            chunks (list): Chunks from chunk_segments
+
+        Returns:
+            VectorIndex: The index
+        """
+        counts = [_features(chunk['text']) for chunk in chunks]
+
+        document_frequency = Counter()
+        for chunk_counts in counts:
+            document_frequency.update(chunk_counts.keys())
+
+        idf_features = np.fromiter(sorted(document_frequency), dtype=np.int64)
+        df = np.fromiter((document_frequency[f] for f in idf_features), dtype=np.float32)
+        idf_values = (np.log((1 + len(chunks)) / (1 + df)) + 1).astype(np.float32)
+
+        indptr = [0]
+        indices, data = [], []
+        for chunk_counts in counts:
+            features = np.fromiter(chunk_counts.keys(), dtype=np.int64, count=len(chunk_counts))
+            tf = 1 + np.log(np.fromiter(chunk_counts.values(), dtype=np.float32, count=len(chunk_counts)))
+            weights = tf * _lookup(idf_features, idf_values, features)
+            norm = np.linalg.norm(weights)
+            if norm > 0:
+                weights /= norm
+            indices.append(features.astype(np.int32))
+            data.append(weights.astype(np.float32))
+            indptr.append(indptr[-1] + len(features))
+
+        return cls(
+            chunks,
+            np.asarray(indptr, dtype=np.int64),
+            np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32),
+            np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+            idf_features,
+            idf_values
+        )
+
+
+    def search(self, query, top_k=4):
+        """
+        Find the chunks most similar to a query
+
+        Args:
+            query (str): Question text
+            top_k (int): Number of chunks to return
+
+        Returns:
+            list: Chunks with an added 'score', best first
+        """
+        query_counts = _features(query)
+        if not query_counts or not self.chunks:
+            return []
+
+        features = np.fromiter(sorted(query_counts), dtype=np.int64)
+        tf = 1 + np.log(np.fromiter((query_counts[f] for f in features), dtype=np.float32))
+        weights = tf * self.idf(features)
+
+        # Sparse dot product of every chunk with the query vector
+        products = self.data * _lookup(features, weights, self.indices)
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        non_empty = np.diff(self.indptr) > 0
+        if products.size:
+            scores[non_empty] = np.add.reduceat(products, self.indptr[:-1][non_empty])
+
+        best = np.argsort(-scores)[:top_k]
+        return [
+            dict(self.chunks[i], score=round(float(scores[i]), 4))
+            for i in best if scores[i] > 0
+        ]
+
+
+    def save(self, video_id):
+        """Write the index to data/indexes/ (arrays as .npz, chunks as .json)"""
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        base = os.path.join(INDEX_DIR, video_id)
+
+        fd, tmp_path = tempfile.mkstemp(dir=INDEX_DIR, suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, indptr=self.indptr, indices=self.indices, data=self.data,
+                                idf_features=self.idf_features, idf_values=self.idf_values)
+        os.replace(tmp_path, base + '.npz')
+
+        fd, tmp_path = tempfile.mkstemp(dir=INDEX_DIR, suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"video_id": video_id, "version": INDEX_VERSION, "chunks": self.chunks},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, base + '.json')
+
+
+    @classmethod
+    def load(cls, video_id):
+        """
+        Read an index from data/indexes/
+
+        Returns:
+            VectorIndex: The index, or None if it does not exist or was built
+                by an older version
+        """
+        base = os.path.join(INDEX_DIR, video_id)
+        try:
+            with open(base + '.json', 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('version') != INDEX_VERSION:
+                return None
+            chunks = stored['chunks']
+            with np.load(base + '.npz') as arrays:
+                return cls(chunks, arrays['indptr'], arrays['indices'], arrays['data'],
+                           arrays['idf_features'], arrays['idf_values'])
+        except FileNotFoundError:
+            return None
+
+
+# Recently used indexes, kept in memory
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def get_index(video_id, segments=None):
+    """
+    Get the index of a video from memory or disk, building it from segments if missing
+
+    Args:
+        video_id (str): YouTube video ID
+        segments (iterable): Transcript or segments, used only when the index must be built
+
+    Returns:
+        VectorIndex: The index, or None if it does not exist and no segments were given
+    """
+    with _loaded_lock:
+        index = _loaded.get(video_id)
+        if index is not None:
+            _loaded.move_to_end(video_id)
+            return index
+
+    index = VectorIndex.load(video_id)
+    if index is None:
+        if not segments:
+            return None
+        index = VectorIndex.build(chunk_segments(segments))
+        index.save(video_id)
+        print(f"✓ Built vector index for {video_id}: {len(index.chunks)} chunks")
+
+    with _loaded_lock:
+        _loaded[video_id] = index
+        while len(_loaded) > MAX_LOADED_INDEXES:
+            _loaded.popitem(last=False)
+
+    return index
+
+
+def drop_index(video_id):
+    """
+    Forget a video's index so it is rebuilt on next use
+
+    Args:
+        video_id (str): YouTube video ID
+    """
+    with _loaded_lock:
+        _loaded.pop(video_id, None)
+    for suffix in ('.npz', '.json'):
+        try:
+            os.remove(os.path.join(INDEX_DIR, video_id + suffix))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,101 @@
+"""
+Video Q&A
+Answers learner questions about a video from the most relevant transcript chunks
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.ai_engine import get_ai_engine
+from backend.youtube_service import get_transcript_cached
+from backend.vector_index import get_index
+from backend.formatter import format_error_response
+from models.prompts import ASK_PROMPT
+
+
+MAX_QUESTION_CHARS = 500   # Longer questions are rejected before any work is done
+
+
+def format_timestamp(seconds):
+    """Format seconds as [mm:ss] or [h:mm:ss]"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def answer_question(youtube_url, question, top_k=4):
+    """
+    Answer a question about a video using retrieved transcript chunks
+    
+    Only the top_k chunks are sent to the AI, so the prompt size does not
+    grow with the length of the video. Chunks are capped at MAX_CHUNK_CHARS
+    and questions at MAX_QUESTION_CHARS characters.
+    
+    Args:
+        youtube_url (str): YouTube video URL or video ID
+        question (str): Learner's question
+        top_k (int): Number of transcript chunks to include
+        
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    if len(question) > MAX_QUESTION_CHARS:
+        return format_error_response(
+            f"Question is too long (at most {MAX_QUESTION_CHARS} characters)",
+            "validation"
+        ), 400
+    
+    transcript_result = get_transcript_cached(youtube_url)
+    
+    if not transcript_result['success']:
+        return format_error_response(
+            transcript_result.get('error', 'Transcript extraction failed'),
+            "transcript_extraction"
+        ), 400
+    
+    video_id = transcript_result['video_id']
+    index = get_index(video_id, transcript_result['transcript'])
+    sources = index.search(question, top_k) if index else []
+    
+    if not sources:
+        return {
+            "success": True,
+            "video_id": video_id,
+            "question": question,
+            "answer": "The video does not seem to cover this question.",
+            "sources": []
+        }, 200
+    
+    # Present excerpts in video order with their timestamps
+    context = "\n\n".join(
+        f"[{format_timestamp(chunk['start'])} - {format_timestamp(chunk['end'])}] {chunk['text']}"
+        for chunk in sorted(sources, key=lambda chunk: chunk['start'])
+    )
+    prompt = ASK_PROMPT.format(context=context, question=question)
+    
+    result = get_ai_engine().generate_response(
+        prompt=prompt,
+        max_tokens=400,
+        temperature=0.3,
+        stage="ask"
+    )
+    
+    if not result['success']:
+        return format_error_response(
+            result.get('error', 'Failed to answer question'),
+            "question_answering"
+        ), 500
+    
+    return {
+        "success": True,
+        "video_id": video_id,
+        "question": question,
+        "answer": result['text'],
+        "sources": sources
+    }, 200
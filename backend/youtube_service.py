@@ -6,9 +6,21 @@ Extracts video transcripts from YouTube videos
 from youtube_transcript_api import YouTubeTranscriptApi
 import re
 import os
+import sys
+import glob
 import json
 from datetime import datetime
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.caption_normalizer import normalize_segments, reduction_report
+from backend.transcript import Transcript
+
+
+# Folder where extracted transcripts are saved
+TRANSCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'transcripts')
+
 
 def extract_video_id(youtube_url):
     """
@@ -117,35 +129,41 @@ def get_transcript(youtube_url):
                 "error": f"No transcript available for this video. The video may not have captions/subtitles enabled. Tried languages: {', '.join([l[0] for l in language_preferences[:5]])}. Error: {error_detail}"
             }
         
-        # Combine all transcript segments
-        full_transcript = " ".join([segment['text'] for segment in transcript_list])
+        # Clean captions (non-speech markers, rolling repeats, fillers) straight into a Transcript
+        normalization_stats = {}
+        transcript = Transcript.from_segments(
+            normalize_segments(transcript_list, normalization_stats, language_used),
+            video_id,
+            language_used
+        )
+        del transcript_list
+        normalization = reduction_report(normalization_stats)
         
         # Validate transcript
-        if not full_transcript or len(full_transcript.strip()) < 50:
+        if len(transcript.text.strip()) < 50:
             return {
                 "success": False,
                 "error": "Transcript is too short or empty. Please try a different video."
             }
         
         # Save transcript to file
-        save_transcript(video_id, full_transcript, transcript_list)
-        
-        word_count = len(full_transcript.split())
-        char_count = len(full_transcript)
+        save_transcript(video_id, transcript, language=language_used, normalization=normalization)
         
         print(f"✓ Successfully extracted transcript:")
         print(f"  - Language: {language_used}")
-        print(f"  - Characters: {char_count:,}")
-        print(f"  - Words: {word_count:,}")
-        print(f"  - Segments: {len(transcript_list)}")
+        print(f"  - Characters: {len(transcript.text):,}")
+        print(f"  - Words: {transcript.word_count:,}")
+        print(f"  - Segments: {len(transcript)}")
+        print(f"  - Normalization saved: {normalization['chars_removed_percent']}% characters "
+              f"(~{normalization['tokens_saved_estimate']:,} tokens)")
         
         return {
             "success": True,
             "video_id": video_id,
-            "transcript": full_transcript,
-            "segments": transcript_list,
-            "word_count": word_count,
-            "language": language_used
+            "transcript": transcript,
+            "word_count": transcript.word_count,
+            "language": language_used,
+            "normalization": normalization
         }
         
     except Exception as e:
@@ -156,18 +174,23 @@ def get_transcript(youtube_url):
         }
 
 
-def save_transcript(video_id, full_transcript, segments):
+def save_transcript(video_id, full_transcript, segments=None, language="unknown", normalization=None):
     """
     Save transcript to data/transcripts folder
     
     Args:
         video_id (str): YouTube video ID
-        full_transcript (str): Full transcript text
-        segments (list): List of transcript segments with timestamps
+        full_transcript (Transcript or str): Transcript object, or full transcript text
+        segments (list): List of transcript segments with timestamps (only needed with text)
+        language (str): Language code of the transcript
+        normalization (dict): Caption normalization report
     """
     try:
+        if not isinstance(full_transcript, Transcript):
+            full_transcript = Transcript.from_segments(segments or [], video_id, language)
+        
         # Create data directory if it doesn't exist
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'transcripts')
+        data_dir = TRANSCRIPTS_DIR
         os.makedirs(data_dir, exist_ok=True)
         
         # Create filename with timestamp
@@ -179,13 +202,21 @@ def save_transcript(video_id, full_transcript, segments):
         transcript_data = {
             "video_id": video_id,
             "timestamp": timestamp,
-            "full_transcript": full_transcript,
-            "segments": segments,
-            "word_count": len(full_transcript.split())
+            "full_transcript": full_transcript.text,
+            "word_count": full_transcript.word_count,
+            "language": language,
+            "normalization": normalization
         }
         
+        # Segments are written one by one instead of building a list of dicts first
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(transcript_data, f, indent=2, ensure_ascii=False)
+            header = json.dumps(transcript_data, ensure_ascii=False)
+            f.write(header[:-1] + ', "segments": [')
+            for index, segment in enumerate(full_transcript):
+                if index:
+                    f.write(', ')
+                f.write(json.dumps(segment, ensure_ascii=False))
+            f.write(']}')
         
         print(f"✓ Transcript saved to: {filepath}")
             
@@ -193,6 +224,63 @@ def save_transcript(video_id, full_transcript, segments):
         print(f"⚠ Warning: Could not save transcript: {str(e)}")
 
 
+def load_saved_transcript(video_id):
+    """
+    Load the most recently saved transcript of a video
+    
+    Args:
+        video_id (str): YouTube video ID
+        
+    Returns:
+        dict: Same shape as a successful get_transcript result, or None if not saved
+    """
+    # Saved files are named <video_id>_<YYYYMMDD>_<HHMMSS>.json, so the newest sorts last
+    pattern = os.path.join(TRANSCRIPTS_DIR, f"{glob.escape(video_id)}_????????_??????.json")
+    for filepath in sorted(glob.glob(pattern), reverse=True):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                transcript_data = json.load(f)
+        except Exception as e:
+            print(f"⚠ Warning: Could not read saved transcript {filepath}: {str(e)}")
+            continue
+        
+        language = transcript_data.get('language', 'unknown')
+        transcript = Transcript.from_segments(transcript_data.get('segments', []), video_id, language)
+        
+        return {
+            "success": True,
+            "video_id": video_id,
+            "transcript": transcript,
+            "word_count": transcript.word_count,
+            "language": language,
+            "normalization": transcript_data.get('normalization'),
+            "from_cache": True
+        }
+    
+    return None
+
+
+def get_transcript_cached(youtube_url):
+    """
+    Get transcript from the saved copy if available, otherwise from YouTube
+    
+    Args:
+        youtube_url (str): YouTube video URL or video ID
+        
+    Returns:
+        dict: Dictionary containing transcript text and metadata
+    """
+    video_id = extract_video_id(youtube_url)
+    
+    if video_id:
+        saved = load_saved_transcript(video_id)
+        if saved:
+            print(f"✓ Using saved transcript for video ID: {video_id}")
+            return saved
+    
+    return get_transcript(youtube_url)
+
+
 if __name__ == "__main__":
     # Test the function
     print("=" * 70)
@@ -225,7 +313,7 @@ if __name__ == "__main__":
                 print(f"  Language: {result.get('language', 'unknown')}")
                 print(f"  Word count: {result['word_count']:,}")
                 print(f"\n  Preview (first 200 chars):")
-                print(f"  {result['transcript'][:200]}...")
+                print(f"  {result['transcript'].text[:200]}...")
             else:
                 print(f"\n✗ FAILED!")
                 print(f"  Error: {result['error']}")
@@ -5,6 +5,7 @@
 const API_BASE_URL = 'http://localhost:5000';
 
 // State management
+let currentVideoId = null;
 let currentQuizData = null;
 let userAnswers = {};
 
@@ -131,6 +132,8 @@ function displayResults(data) {
     // Hide loading
     elements.loadingSection.classList.add('hidden');
     
+    currentVideoId = data.video_id;
+    
     // Display summary
     displaySummary(data.summary);
     
@@ -265,6 +268,9 @@ function handleSubmitQuiz() {
     // Display score
     displayScore(score, totalQuestions);
     
+    // Send answers for question statistics
+    submitAttempt();
+    
     // Disable submit button
     elements.submitQuizBtn.disabled = true;
     elements.submitQuizBtn.textContent = 'Quiz Submitted';
@@ -273,6 +279,23 @@ function handleSubmitQuiz() {
     elements.quizResults.scrollIntoView({ behavior: 'smooth' });
 }
 
+// Send quiz answers to the backend (grading above stays local)
+function submitAttempt() {
+    const answers = currentQuizData.map((question, index) => ({
+        question_id: question.id,
+        question_index: index,
+        answer: userAnswers[index]
+    }));
+    
+    fetch(`${API_BASE_URL}/api/quiz/attempts`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ video_id: currentVideoId, answers: answers })
+    }).catch(error => console.error('Could not record quiz attempt:', error));
+}
+
 // Display quiz score
 function displayScore(score, total) {
     const percentage = (score / total) * 100;
@@ -58,3 +58,46 @@ Correct Answer: [A/B/C/D]
 
 **Quiz (10 Questions):**
 """
+
+QUIZ_BANK_PROMPT = """
+You are an expert quiz creator for educational content. Based on the following section of a video transcript, create exactly {count} multiple-choice questions (MCQs) for a question bank.
+
+**Requirements:**
+- Create exactly {count} questions about this section only
+- Each question must have 4 options (A, B, C, D)
+- Only one option should be correct
+- Every question must test a different fact or idea; do not repeat questions
+- Questions should test understanding, not just memorization
+- Indicate the correct answer for each question
+
+**Format for each question:**
+Question X: [Question text]
+A) [Option A]
+B) [Option B]
+C) [Option C]
+D) [Option D]
+Correct Answer: [A/B/C/D]
+
+**Transcript Section:**
+{transcript}
+
+**Quiz ({count} Questions):**
+"""
+
+ASK_PROMPT = """
+You are an expert tutor answering a student's question about an educational video. Use only the transcript excerpts below, which are the parts of the video most relevant to the question.
+
+**Requirements:**
+- Answer clearly and concisely (under 150 words)
+- Base the answer only on the excerpts
+- Refer to the timestamps (e.g. [12:30]) where the video covers the answer
+- If the excerpts do not contain the answer, say that the video does not seem to cover it
+
+**Transcript Excerpts:**
+{context}
+
+**Question:**
+{question}
+
+**Answer:**
+"""